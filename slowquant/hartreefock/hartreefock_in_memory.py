@@ -49,11 +49,15 @@ def run_hartree_fock(
         number_bf = len(S)
         diis_acceleration = DIIS(number_bf)
 
+    # The Coulomb and exchange contractions have the same shapes in every iteration,
+    # so the contraction path is only determined once.
+    jk_path = np.einsum_path("pqrs,sr->pq", ERI, D0, optimize="optimal")[0]
+
     # SCF iterations
     for iteration in range(1, max_scf_iterations + 1):
         # New Fock Matrix
-        J = np.einsum("pqrs,sr->pq", ERI, D0)
-        K = np.einsum("psqr,sr->pq", ERI, D0)
+        J = np.einsum("pqrs,sr->pq", ERI, D0, optimize=jk_path)
+        K = np.einsum("psqr,sr->pq", ERI, D0, optimize=jk_path)
         F = Hcore + J - 0.5 * K
 
         # Do DIIS acceleration
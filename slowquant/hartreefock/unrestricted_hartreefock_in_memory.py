@@ -63,13 +63,17 @@ def run_unrestricted_hartree_fock(
         diis_acceleration_alpha = DIIS(number_bf)
         diis_acceleration_beta = DIIS(number_bf)
 
+    # The Coulomb and exchange contractions have the same shapes in every iteration,
+    # so the contraction path is only determined once.
+    jk_path = np.einsum_path("pqrs,sr->pq", ERI, D0_alpha, optimize="optimal")[0]
+
     # SCF iterations
     for iteration in range(1, max_scf_iterations + 1):
         # New Fock Matrix
-        J_alpha = np.einsum("pqrs,sr->pq", ERI, D0_alpha)
-        K_alpha = np.einsum("psqr,sr->pq", ERI, D0_alpha)
-        J_beta = np.einsum("pqrs,sr->pq", ERI, D0_beta)
-        K_beta = np.einsum("psqr,sr->pq", ERI, D0_beta)
+        J_alpha = np.einsum("pqrs,sr->pq", ERI, D0_alpha, optimize=jk_path)
+        K_alpha = np.einsum("psqr,sr->pq", ERI, D0_alpha, optimize=jk_path)
+        J_beta = np.einsum("pqrs,sr->pq", ERI, D0_beta, optimize=jk_path)
+        K_beta = np.einsum("psqr,sr->pq", ERI, D0_beta, optimize=jk_path)
         F_alpha = Hcore + J_alpha + J_beta - K_alpha
         F_beta = Hcore + J_beta + J_alpha - K_beta
 
@@ -15,6 +15,8 @@ class CI_Info:
         "num_active_orbs",
         "num_inactive_orbs",
         "num_virtual_orbs",
+        "sorted_det_idxs",
+        "sorted_dets",
         "space_extension_offset",
     )
 
@@ -50,6 +52,9 @@ class CI_Info:
         for k, v in det2idx.items():
             nb_dict[k] = v
         self.det2idx = nb_dict
+        # Sorted determinants for binary search lookup of the index in jitted code.
+        self.sorted_det_idxs = np.argsort(idx2det, kind="stable").astype(np.int64)
+        self.sorted_dets = np.ascontiguousarray(idx2det[self.sorted_det_idxs], dtype=np.int64)
         self.space_extension_offset = 0
 
 
@@ -1,7 +1,83 @@
+from collections.abc import Sequence
+from typing import Any
+
 import numba as nb
 import numpy as np
 
 
+@nb.jit(nopython=True)
+def build_full_rdm1(num_inactive_orbs: int, num_active_orbs: int, rdm1: np.ndarray) -> np.ndarray:
+    r"""Construct the one-electron reduced density matrix in the inactive and active space.
+
+    .. math::
+        \Gamma^{[1]}_{pq} = \left\{\begin{array}{ll}
+                            2\delta_{ij} & pq = ij\\
+                            \left<0\left|\hat{E}_{vw}\right|0\right> & pq = vw\\
+                            0 & \text{otherwise} \\
+                            \end{array} \right.
+
+    Args:
+        num_inactive_orbs: Number of spatial inactive orbitals.
+        num_active_orbs: Number of spatial active orbitals.
+        rdm1: Active part of 1-RDM.
+
+    Returns:
+        One-electron reduced density matrix, of dimension inactive plus active orbitals.
+    """
+    num_occ = num_inactive_orbs + num_active_orbs
+    rdm1_full = np.zeros((num_occ, num_occ))
+    for i in range(num_inactive_orbs):
+        rdm1_full[i, i] = 2
+    rdm1_full[num_inactive_orbs:, num_inactive_orbs:] = rdm1
+    return rdm1_full
+
+
+@nb.jit(nopython=True, parallel=True)
+def build_full_rdm2(
+    num_inactive_orbs: int, num_active_orbs: int, rdm1: np.ndarray, rdm2: np.ndarray
+) -> np.ndarray:
+    r"""Construct the two-electron reduced density matrix in the inactive and active space.
+
+    .. math::
+        \Gamma^{[2]}_{pqrs} = \left\{\begin{array}{ll}
+                              4\delta_{ij}\delta_{kl} - 2\delta_{jk}\delta_{il} & pqrs = ijkl\\
+                              2\delta_{ij} \Gamma^{[1]}_{vw} & pqrs = vwij\\
+                              - \delta_{ij}\Gamma^{[1]}_{vw} & pqrs = ivwj\\
+                              \left<0\left|\hat{e}_{vwxy}\right|0\right> & pqrs = vwxy\\
+                              0 & \text{otherwise} \\
+                              \end{array} \right.
+
+    and the symmetry `\Gamma^{[2]}_{pqrs}=\Gamma^{[2]}_{rspq}=\Gamma^{[2]}_{qpsr}=\Gamma^{[2]}_{srqp}`:math:.
+
+    Args:
+        num_inactive_orbs: Number of spatial inactive orbitals.
+        num_active_orbs: Number of spatial active orbitals.
+        rdm1: Active part of 1-RDM.
+        rdm2: Active part of 2-RDM.
+
+    Returns:
+        Two-electron reduced density matrix, of dimension inactive plus active orbitals.
+    """
+    nI = num_inactive_orbs
+    num_occ = num_inactive_orbs + num_active_orbs
+    rdm2_full = np.zeros((num_occ, num_occ, num_occ, num_occ))
+    # Every iteration only writes elements with index i in a unique position,
+    # so the inactive orbitals can be filled in parallel.
+    for i in nb.prange(nI):
+        for j in range(nI):
+            # ijkl type index
+            rdm2_full[i, i, j, j] += 4
+            rdm2_full[i, j, j, i] -= 2
+        # uvij and ijuv type index
+        rdm2_full[nI:, nI:, i, i] = 2 * rdm1
+        rdm2_full[i, i, nI:, nI:] = 2 * rdm1
+        # iuvj and uijv type index
+        rdm2_full[i, nI:, nI:, i] = -rdm1
+        rdm2_full[nI:, i, i, nI:] = -rdm1
+    rdm2_full[nI:, nI:, nI:, nI:] = rdm2
+    return rdm2_full
+
+
 @nb.jit(nopython=True)
 def RDM1(p: int, q: int, num_inactive_orbs: int, num_active_orbs: int, rdm1: np.ndarray) -> float:
     r"""Get full space one-electron reduced density matrix element.
@@ -136,7 +212,36 @@ def RDM2(
     return 0
 
 
-@nb.jit(nopython=True)
+def _as_kappa_array(kappa_idx: Sequence[tuple[int, int]] | np.ndarray) -> np.ndarray:
+    """Convert orbital parameter indices to a contiguous integer array.
+
+    Args:
+        kappa_idx: Orbital parameter indices in spatial basis.
+
+    Returns:
+        Orbital parameter indices as an array of shape (number of parameters, 2).
+    """
+    return np.ascontiguousarray(kappa_idx, dtype=np.int64).reshape(-1, 2)
+
+
+def _get_array_module(use_gpu: bool) -> Any:
+    """Get the array module used for tensor contractions.
+
+    CuPy is an optional dependency, and is only imported when GPU offloading is requested.
+
+    Args:
+        use_gpu: Use CuPy on the GPU instead of NumPy.
+
+    Returns:
+        Array module.
+    """
+    if use_gpu:
+        import cupy  # noqa: PLC0415
+
+        return cupy
+    return np
+
+
 def get_electronic_energy(
     h_int: np.ndarray,
     g_int: np.ndarray,
@@ -150,6 +255,9 @@ def get_electronic_energy(
     .. math::
         E = \sum_{pq}h_{pq}\Gamma^{[1]}_{pq} + \frac{1}{2}\sum_{pqrs}g_{pqrs}\Gamma^{[2]}_{pqrs}
 
+    The sums are evaluated block-wise using the structure of the full space RDMs,
+    such that only the non-zero inactive and active blocks are contracted.
+
     Args:
         h_int: One-electron integrals in MO.
         g_int: Two-electron integrals in MO.
@@ -161,37 +269,97 @@ def get_electronic_energy(
     Returns:
         Electronic energy.
     """
-    energy = 0
-    for p in range(num_inactive_orbs + num_active_orbs):
-        for q in range(num_inactive_orbs + num_active_orbs):
-            energy += h_int[p, q] * RDM1(p, q, num_inactive_orbs, num_active_orbs, rdm1)
-    for p in range(num_inactive_orbs + num_active_orbs):
-        for q in range(num_inactive_orbs + num_active_orbs):
-            for r in range(num_inactive_orbs + num_active_orbs):
-                for s in range(num_inactive_orbs + num_active_orbs):
-                    energy += (
-                        1
-                        / 2
-                        * g_int[p, q, r, s]
-                        * RDM2(p, q, r, s, num_inactive_orbs, num_active_orbs, rdm1, rdm2)
-                    )
+    i = slice(0, num_inactive_orbs)
+    v = slice(num_inactive_orbs, num_inactive_orbs + num_active_orbs)
+    # 1e contribution
+    energy = 2 * np.trace(h_int[i, i]) + np.einsum("vw,vw->", h_int[v, v], rdm1)
+    # 2e contribution, ijkl
+    energy += 2 * np.einsum("iijj->", g_int[i, i, i, i]) - np.einsum("ijji->", g_int[i, i, i, i])
+    # 2e contribution, vwij and ijvw (equal by g_pqrs = g_rspq)
+    energy += 2 * np.einsum("vwii,vw->", g_int[v, v, i, i], rdm1)
+    # 2e contribution, ivwj and vijw (equal by g_pqrs = g_qpsr)
+    energy -= np.einsum("ivwi,vw->", g_int[i, v, v, i], rdm1)
+    # 2e contribution, vwxy
+    energy += 1 / 2 * np.einsum("vwxy,vwxy->", g_int[v, v, v, v], rdm2, optimize=["einsum_path", (0, 1)])
     return energy
 
 
-@nb.jit(nopython=True)
+def get_generalized_fock_matrix(
+    h_int: np.ndarray,
+    g_int: np.ndarray,
+    num_inactive_orbs: int,
+    num_active_orbs: int,
+    rdm1: np.ndarray,
+    rdm2: np.ndarray,
+    dtype: type[np.floating] = np.float64,
+) -> np.ndarray:
+    r"""Calculate the generalized Fock matrix.
+
+    .. math::
+        F_{nm} = 2\sum_{p}h_{np}\Gamma^{[1]}_{mp} + 2\sum_{pqr}g_{npqr}\Gamma^{[2]}_{mpqr}
+
+    The columns belonging to virtual orbitals are zero.
+
+    Args:
+        h_int: One-electron integrals in MO in Hamiltonian.
+        g_int: Two-electron integrals in MO in Hamiltonian.
+        num_inactive_orbs: Number of inactive orbitals in spatial basis.
+        num_active_orbs: Number of active orbitals in spatial basis.
+        rdm1: Active part of 1-RDM.
+        rdm2: Active part of 2-RDM.
+        dtype: Floating point precision of the integral and RDM contractions.
+            The result is always returned in double precision.
+
+    Returns:
+        Generalized Fock matrix.
+    """
+    # The inactive parts of the RDMs are products of Kronecker deltas and the active 1-RDM,
+    # so each block of the 2-RDM is contracted on its own instead of building the full 2-RDM.
+    inactive = slice(0, num_inactive_orbs)
+    active = slice(num_inactive_orbs, num_inactive_orbs + num_active_orbs)
+    rdm1 = rdm1.astype(dtype, copy=False)
+    rdm2 = rdm2.astype(dtype, copy=False)
+    h_int = h_int.astype(dtype, copy=False)
+    g_iii = g_int[:, inactive, inactive, inactive].astype(dtype, copy=False)
+    fock = np.zeros(h_int.shape)
+    # Inactive columns, m = i.
+    fock[:, inactive] = 4 * h_int[:, inactive]
+    fock[:, inactive] += 8 * np.einsum("nijj->ni", g_iii) - 4 * np.einsum("njji->ni", g_iii)
+    fock[:, inactive] += 4 * np.einsum(
+        "nivw,vw->ni", g_int[:, inactive, active, active].astype(dtype, copy=False), rdm1
+    )
+    fock[:, inactive] -= 2 * np.einsum(
+        "nvwi,vw->ni", g_int[:, active, active, inactive].astype(dtype, copy=False), rdm1
+    )
+    # Active columns, m = t.
+    g_aii = g_int[:, active, inactive, inactive].astype(dtype, copy=False)
+    g_iia = g_int[:, inactive, inactive, active].astype(dtype, copy=False)
+    fock[:, active] = (
+        2 * h_int[:, active] + 4 * np.einsum("nwjj->nw", g_aii) - 2 * np.einsum("njjw->nw", g_iia)
+    ) @ rdm1.T
+    fock[:, active] += 2 * np.einsum(
+        "npqr,tpqr->nt",
+        g_int[:, active, active, active].astype(dtype, copy=False),
+        rdm2,
+        optimize=["einsum_path", (0, 1)],
+    )
+    return fock
+
+
 def get_orbital_gradient(
     h_int: np.ndarray,
     g_int: np.ndarray,
-    kappa_idx: list[tuple[int, int]],
+    kappa_idx: Sequence[tuple[int, int]] | np.ndarray,
     num_inactive_orbs: int,
     num_active_orbs: int,
     rdm1: np.ndarray,
     rdm2: np.ndarray,
+    dtype: type[np.floating] = np.float64,
 ) -> np.ndarray:
     r"""Calculate the orbital gradient.
 
     .. math::
-        g_{pq}^{\hat{\kappa}} = \left<0\left|\left[\hat{\kappa}_{pq},\hat{H}\right]\right|0\right>
+        g_{pq}^{\hat{\kappa}} = \left<0\left|\left[\hat{\kappa}_{pq},\hat{H}\right]\right|0\right> = F_{qp} - F_{pq}
 
     Args:
         h_int: One-electron integrals in MO in Hamiltonian.
@@ -201,44 +369,30 @@ def get_orbital_gradient(
         num_active_orbs: Number of active orbitals in spatial basis.
         rdm1: Active part of 1-RDM.
         rdm2: Active part of 2-RDM.
+        dtype: Floating point precision of the integral and RDM contractions.
+            The result is always returned in double precision.
 
     Returns:
         Orbital gradient.
     """
-    gradient = np.zeros(len(kappa_idx))
-    for idx, (m, n) in enumerate(kappa_idx):
-        # 1e contribution
-        for p in range(num_inactive_orbs + num_active_orbs):
-            gradient[idx] += 2 * h_int[n, p] * RDM1(m, p, num_inactive_orbs, num_active_orbs, rdm1)
-            gradient[idx] -= 2 * h_int[p, m] * RDM1(p, n, num_inactive_orbs, num_active_orbs, rdm1)
-        # 2e contribution
-        for p in range(num_inactive_orbs + num_active_orbs):
-            for q in range(num_inactive_orbs + num_active_orbs):
-                for r in range(num_inactive_orbs + num_active_orbs):
-                    gradient[idx] += g_int[n, p, q, r] * RDM2(
-                        m, p, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    gradient[idx] -= g_int[p, m, q, r] * RDM2(
-                        p, n, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    gradient[idx] -= g_int[m, p, q, r] * RDM2(
-                        n, p, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    gradient[idx] += g_int[p, n, q, r] * RDM2(
-                        p, m, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-    return gradient
+    fock = get_generalized_fock_matrix(
+        h_int, g_int, num_inactive_orbs, num_active_orbs, rdm1, rdm2, dtype=dtype
+    )
+    kappa_idx = _as_kappa_array(kappa_idx)
+    m = kappa_idx[:, 0]
+    n = kappa_idx[:, 1]
+    return fock[n, m] - fock[m, n]
 
 
-@nb.jit(nopython=True)
 def get_orbital_gradient_response(
     h_int: np.ndarray,
     g_int: np.ndarray,
-    kappa_idx: list[tuple[int, int]],
+    kappa_idx: Sequence[tuple[int, int]] | np.ndarray,
     num_inactive_orbs: int,
     num_active_orbs: int,
     rdm1: np.ndarray,
     rdm2: np.ndarray,
+    dtype: type[np.floating] = np.float64,
 ) -> np.ndarray:
     r"""Calculate the response orbital parameter gradient.
 
@@ -253,84 +407,46 @@ def get_orbital_gradient_response(
         num_active_orbs: Number of active orbitals in spatial basis.
         rdm1: Active part of 1-RDM.
         rdm2: Active part of 2-RDM.
+        dtype: Floating point precision of the integral and RDM contractions.
+            The result is always returned in double precision.
 
     Returns:
         Orbital response parameter gradient.
     """
-    gradient = np.zeros(2 * len(kappa_idx))
-    for idx, (m, n) in enumerate(kappa_idx):
-        # 1e contribution
-        for p in range(num_inactive_orbs + num_active_orbs):
-            gradient[idx] += h_int[n, p] * RDM1(m, p, num_inactive_orbs, num_active_orbs, rdm1)
-            gradient[idx] -= h_int[p, m] * RDM1(p, n, num_inactive_orbs, num_active_orbs, rdm1)
-        # 2e contribution
-        for p in range(num_inactive_orbs + num_active_orbs):
-            for q in range(num_inactive_orbs + num_active_orbs):
-                for r in range(num_inactive_orbs + num_active_orbs):
-                    gradient[idx] += (
-                        1
-                        / 2
-                        * g_int[n, p, q, r]
-                        * RDM2(m, p, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2)
-                    )
-                    gradient[idx] -= (
-                        1
-                        / 2
-                        * g_int[p, m, q, r]
-                        * RDM2(p, n, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2)
-                    )
-                    gradient[idx] -= (
-                        1
-                        / 2
-                        * g_int[m, p, q, r]
-                        * RDM2(n, p, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2)
-                    )
-                    gradient[idx] += (
-                        1
-                        / 2
-                        * g_int[p, n, q, r]
-                        * RDM2(p, m, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2)
-                    )
+    fock = get_generalized_fock_matrix(
+        h_int, g_int, num_inactive_orbs, num_active_orbs, rdm1, rdm2, dtype=dtype
+    )
+    kappa_idx = _as_kappa_array(kappa_idx)
     shift = len(kappa_idx)
-    for idx, (n, m) in enumerate(kappa_idx):
-        # 1e contribution
-        for p in range(num_inactive_orbs + num_active_orbs):
-            gradient[idx + shift] += h_int[n, p] * RDM1(m, p, num_inactive_orbs, num_active_orbs, rdm1)
-            gradient[idx + shift] -= h_int[p, m] * RDM1(p, n, num_inactive_orbs, num_active_orbs, rdm1)
-        # 2e contribution
-        for p in range(num_inactive_orbs + num_active_orbs):
-            for q in range(num_inactive_orbs + num_active_orbs):
-                for r in range(num_inactive_orbs + num_active_orbs):
-                    gradient[idx + shift] += (
-                        1
-                        / 2
-                        * g_int[n, p, q, r]
-                        * RDM2(m, p, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2)
-                    )
-                    gradient[idx + shift] -= (
-                        1
-                        / 2
-                        * g_int[p, m, q, r]
-                        * RDM2(p, n, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2)
-                    )
-                    gradient[idx + shift] -= (
-                        1
-                        / 2
-                        * g_int[m, p, q, r]
-                        * RDM2(n, p, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2)
-                    )
-                    gradient[idx + shift] += (
-                        1
-                        / 2
-                        * g_int[p, n, q, r]
-                        * RDM2(p, m, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2)
-                    )
+    gradient = np.zeros(2 * shift)
+    m = kappa_idx[:, 0]
+    n = kappa_idx[:, 1]
+    gradient[:shift] = 1 / 2 * (fock[n, m] - fock[m, n])
+    # The de-excitation part has the indices swapped, which only flips the sign
+    gradient[shift:] = -gradient[:shift]
     return 2 ** (-1 / 2) * gradient
 
 
-@nb.jit(nopython=True)
+def _gather_rdm1(rdm1_full: np.ndarray, p: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """Gather full space one-electron reduced density matrix elements.
+
+    Elements with a virtual index are zero.
+
+    Args:
+        rdm1_full: 1-RDM in the inactive and active space, see :func:`build_full_rdm1`.
+        p: Spatial orbital indices.
+        q: Spatial orbital indices.
+
+    Returns:
+        One-electron reduced density matrix elements, broadcast over the index arrays.
+    """
+    num_occ = rdm1_full.shape[0]
+    mask = (p < num_occ) & (q < num_occ)
+    return np.where(mask, rdm1_full[np.minimum(p, num_occ - 1), np.minimum(q, num_occ - 1)], 0.0)
+
+
 def get_orbital_response_metric_sigma(
-    kappa_idx: list[tuple[int, int]],
+    kappa_idx: Sequence[tuple[int, int]] | np.ndarray,
     num_inactive_orbs: int,
     num_active_orbs: int,
     rdm1: np.ndarray,
@@ -349,19 +465,18 @@ def get_orbital_response_metric_sigma(
     Returns:
         Sigma matrix orbital-orbital block.
     """
-    sigma = np.zeros((len(kappa_idx), len(kappa_idx)))
-    for idx1, (n, m) in enumerate(kappa_idx):
-        for idx2, (p, q) in enumerate(kappa_idx):
-            if p == n:
-                sigma[idx1, idx2] += RDM1(m, q, num_inactive_orbs, num_active_orbs, rdm1)
-            if m == q:
-                sigma[idx1, idx2] -= RDM1(p, n, num_inactive_orbs, num_active_orbs, rdm1)
+    rdm1_full = build_full_rdm1(num_inactive_orbs, num_active_orbs, rdm1)
+    kappa_idx = _as_kappa_array(kappa_idx)
+    n = kappa_idx[:, 0, None]
+    m = kappa_idx[:, 1, None]
+    p = kappa_idx[None, :, 0]
+    q = kappa_idx[None, :, 1]
+    sigma = (p == n) * _gather_rdm1(rdm1_full, m, q) - (m == q) * _gather_rdm1(rdm1_full, p, n)
     return -1 / 2 * sigma
 
 
-@nb.jit(nopython=True)
 def get_orbital_response_vector_norm(
-    kappa_idx: list[list[int]],
+    kappa_idx: Sequence[tuple[int, int]] | np.ndarray,
     num_inactive_orbs: int,
     num_active_orbs: int,
     rdm1: np.ndarray,
@@ -386,40 +501,23 @@ def get_orbital_response_vector_norm(
     Returns:
         Orbital part of excited state norm.
     """
-    norm = 0
-    for i, (m, n) in enumerate(kappa_idx):
-        for j, (t, u) in enumerate(kappa_idx):
-            if n == u:
-                norm += (
-                    response_vectors[i, state_number]
-                    * response_vectors[j, state_number]
-                    * RDM1(m, t, num_inactive_orbs, num_active_orbs, rdm1)
-                )
-            if m == t:
-                norm -= (
-                    response_vectors[i, state_number]
-                    * response_vectors[j, state_number]
-                    * RDM1(n, u, num_inactive_orbs, num_active_orbs, rdm1)
-                )
-            if m == t:
-                norm += (
-                    response_vectors[i + number_excitations, state_number]
-                    * response_vectors[j + number_excitations, state_number]
-                    * RDM1(n, u, num_inactive_orbs, num_active_orbs, rdm1)
-                )
-            if n == u:
-                norm -= (
-                    response_vectors[i + number_excitations, state_number]
-                    * response_vectors[j + number_excitations, state_number]
-                    * RDM1(m, t, num_inactive_orbs, num_active_orbs, rdm1)
-                )
+    rdm1_full = build_full_rdm1(num_inactive_orbs, num_active_orbs, rdm1)
+    kappa_idx = _as_kappa_array(kappa_idx)
+    num_kappa = len(kappa_idx)
+    m = kappa_idx[:, 0, None]
+    n = kappa_idx[:, 1, None]
+    t = kappa_idx[None, :, 0]
+    u = kappa_idx[None, :, 1]
+    metric = (n == u) * _gather_rdm1(rdm1_full, m, t) - (m == t) * _gather_rdm1(rdm1_full, n, u)
+    x = response_vectors[:num_kappa, state_number]
+    y = response_vectors[number_excitations : number_excitations + num_kappa, state_number]
+    norm = x @ metric @ x - y @ metric @ y
     return 1 / 2 * norm
 
 
-@nb.jit(nopython=True)
 def get_orbital_response_property_gradient(
     x_mo: np.ndarray,
-    kappa_idx: list[tuple[int, int]],
+    kappa_idx: Sequence[tuple[int, int]] | np.ndarray,
     num_inactive_orbs: int,
     num_active_orbs: int,
     rdm1: np.ndarray,
@@ -445,38 +543,43 @@ def get_orbital_response_property_gradient(
     Returns:
         Orbital part of property gradient.
     """
-    prop_grad = 0
-    for i, (m, n) in enumerate(kappa_idx):
-        for p in range(num_inactive_orbs + num_active_orbs):
-            prop_grad += (
-                (response_vectors[i + number_excitations, state_number] - response_vectors[i, state_number])
-                * x_mo[n, p]
-                * RDM1(m, p, num_inactive_orbs, num_active_orbs, rdm1)
-            )
-            prop_grad += (
-                (response_vectors[i, state_number] - response_vectors[i + number_excitations, state_number])
-                * x_mo[m, p]
-                * RDM1(n, p, num_inactive_orbs, num_active_orbs, rdm1)
-            )
+    num_occ = num_inactive_orbs + num_active_orbs
+    rdm1_full = build_full_rdm1(num_inactive_orbs, num_active_orbs, rdm1)
+    kappa_idx = _as_kappa_array(kappa_idx)
+    num_kappa = len(kappa_idx)
+    m = kappa_idx[:, 0]
+    n = kappa_idx[:, 1]
+    # x_rdm1[p, q] = sum_r x_pr Gamma_qr
+    x_rdm1 = np.zeros_like(x_mo)
+    x_rdm1[:, :num_occ] = x_mo[:, :num_occ] @ rdm1_full.T
+    diff = (
+        response_vectors[number_excitations : number_excitations + num_kappa, state_number]
+        - response_vectors[:num_kappa, state_number]
+    )
+    prop_grad = diff @ (x_rdm1[n, m] - x_rdm1[m, n])
     return 2 ** (-1 / 2) * prop_grad
 
 
-@nb.jit(nopython=True)
 def get_orbital_response_hessian_block(
     h: np.ndarray,
     g: np.ndarray,
-    kappa_idx1: list[tuple[int, int]],
-    kappa_idx2: list[tuple[int, int]],
+    kappa_idx1: Sequence[tuple[int, int]] | np.ndarray,
+    kappa_idx2: Sequence[tuple[int, int]] | np.ndarray,
     num_inactive_orbs: int,
     num_active_orbs: int,
     rdm1: np.ndarray,
     rdm2: np.ndarray,
+    dtype: type[np.floating] = np.float64,
+    use_gpu: bool = False,
 ) -> np.ndarray:
     r"""Calculate Hessian-like orbital-orbital block.
 
     .. math::
         H^{\hat{q},\hat{q}}_{tu,mn} = \left<0\left|\left[\hat{q}_{tu},\left[\hat{H},\hat{q}_{mn}\right]\right]\right|0\right>
 
+    Each term is contracted for all orbital index combinations at once,
+    and afterwards gathered at the orbital parameter indices.
+
     Args:
         h: Hamiltonian one-electron integrals in MO basis.
         g: Hamiltonian two-electron integrals in MO basis.
@@ -486,78 +589,62 @@ def get_orbital_response_hessian_block(
         num_active_orbs: Number of active orbitals in spatial basis.
         rdm1: Active part of 1-RDM.
         rdm2: Active part of 2-RDM.
+        dtype: Floating point precision of the integral and RDM contractions.
+            The result is always returned in double precision.
+        use_gpu: Evaluate the 2e contractions on the GPU using CuPy.
 
     Returns:
         Hessian-like orbital-orbital block.
     """
-    A1e = np.zeros((len(kappa_idx1), len(kappa_idx1)))
-    A2e = np.zeros((len(kappa_idx1), len(kappa_idx1)))
-    for idx1, (t, u) in enumerate(kappa_idx1):
-        for idx2, (m, n) in enumerate(kappa_idx2):
-            # 1e contribution
-            A1e[idx1, idx2] += h[n, t] * RDM1(m, u, num_inactive_orbs, num_active_orbs, rdm1)
-            A1e[idx1, idx2] += h[u, m] * RDM1(t, n, num_inactive_orbs, num_active_orbs, rdm1)
-            for p in range(num_inactive_orbs + num_active_orbs):
-                if m == u:
-                    A1e[idx1, idx2] -= h[n, p] * RDM1(t, p, num_inactive_orbs, num_active_orbs, rdm1)
-                if t == n:
-                    A1e[idx1, idx2] -= h[p, m] * RDM1(p, u, num_inactive_orbs, num_active_orbs, rdm1)
-            # 2e contribution
-            for p in range(num_inactive_orbs + num_active_orbs):
-                for q in range(num_inactive_orbs + num_active_orbs):
-                    A2e[idx1, idx2] += g[n, t, p, q] * RDM2(
-                        m, u, p, q, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    A2e[idx1, idx2] -= g[n, p, u, q] * RDM2(
-                        m, p, t, q, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    A2e[idx1, idx2] += g[n, p, q, t] * RDM2(
-                        m, p, q, u, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    A2e[idx1, idx2] += g[u, m, p, q] * RDM2(
-                        t, n, p, q, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    A2e[idx1, idx2] += g[p, m, u, q] * RDM2(
-                        p, n, t, q, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    A2e[idx1, idx2] -= g[p, m, q, t] * RDM2(
-                        p, n, q, u, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    A2e[idx1, idx2] -= g[u, p, n, q] * RDM2(
-                        t, p, m, q, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    A2e[idx1, idx2] += g[p, t, n, q] * RDM2(
-                        p, u, m, q, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    A2e[idx1, idx2] += g[p, q, n, t] * RDM2(
-                        p, q, m, u, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    A2e[idx1, idx2] += g[u, p, q, m] * RDM2(
-                        t, p, q, n, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    A2e[idx1, idx2] -= g[p, t, q, m] * RDM2(
-                        p, u, q, n, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-                    A2e[idx1, idx2] += g[p, q, u, m] * RDM2(
-                        p, q, t, n, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                    )
-            for p in range(num_inactive_orbs + num_active_orbs):
-                for q in range(num_inactive_orbs + num_active_orbs):
-                    for r in range(num_inactive_orbs + num_active_orbs):
-                        if m == u:
-                            A2e[idx1, idx2] -= g[n, p, q, r] * RDM2(
-                                t, p, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                            )
-                        if t == n:
-                            A2e[idx1, idx2] -= g[p, m, q, r] * RDM2(
-                                p, u, q, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                            )
-                        if m == u:
-                            A2e[idx1, idx2] -= g[p, q, n, r] * RDM2(
-                                p, q, t, r, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                            )
-                        if t == n:
-                            A2e[idx1, idx2] -= g[p, q, r, m] * RDM2(
-                                p, q, r, u, num_inactive_orbs, num_active_orbs, rdm1, rdm2
-                            )
-    return 1 / 2 * A1e + 1 / 4 * A2e
+    num_occ = num_inactive_orbs + num_active_orbs
+    o = slice(0, num_occ)
+    rdm1_full = build_full_rdm1(num_inactive_orbs, num_active_orbs, rdm1)
+    rdm2_full = build_full_rdm2(num_inactive_orbs, num_active_orbs, rdm1, rdm2)
+    kappa_idx1 = _as_kappa_array(kappa_idx1)
+    kappa_idx2 = _as_kappa_array(kappa_idx2)
+    t = kappa_idx1[:, 0, None]
+    u = kappa_idx1[:, 1, None]
+    m = kappa_idx2[None, :, 0]
+    n = kappa_idx2[None, :, 1]
+    # 1e contribution
+    A1e = h[n, t] * _gather_rdm1(rdm1_full, m, u) + h[u, m] * _gather_rdm1(rdm1_full, t, n)
+    # 2e contribution
+    # The twelve terms reduce to three intermediates, using the symmetries
+    # g_pqrs = g_rspq = g_qpsr and Gamma_pqrs = Gamma_rspq = Gamma_qpsr.
+    # The intermediates have the two general indices first, and the two occupied indices last.
+    #   X_abcd = sum_pq g_abpq Gamma_cdpq, from g_ntpq Gamma_mupq, g_pqnt Gamma_pqmu, g_umpq Gamma_tnpq and g_pqum Gamma_pqtn
+    #   Y_abcd = sum_pq g_apqb Gamma_cpqd, from g_npqt Gamma_mpqu, g_upqm Gamma_tpqn, g_pmuq Gamma_pntq and g_ptnq Gamma_pumq
+    #   Z_abcd = sum_pq g_apbq Gamma_cpdq, from g_npuq Gamma_mptq, g_upnq Gamma_tpmq, g_pmqt Gamma_pnqu and g_ptqm Gamma_puqn
+    # With the 8-fold symmetry of g, only the Coulomb-like (ab|pq) and exchange-like (ap|qb)
+    # sub-blocks are distinct, g_apbq = g_apqb, so Z reads the same sub-block as Y.
+    xp = _get_array_module(use_gpu)
+    # All contractions are pairwise, so the contraction path is fixed and no path search is needed.
+    # On the GPU CuPy plans the contraction itself.
+    optimize = True if use_gpu else ["einsum_path", (0, 1)]
+    g_coulomb = xp.asarray(g[:, :, o, o], dtype=dtype)
+    g_exchange = xp.asarray(g[:, o, o, :], dtype=dtype)
+    rdm2_full = xp.asarray(rdm2_full, dtype=dtype)
+    X = xp.einsum("abpq,cdpq->abcd", g_coulomb, rdm2_full, optimize=optimize)
+    Y = xp.einsum("apqb,cpqd->abcd", g_exchange, rdm2_full, optimize=optimize)
+    Z = xp.einsum("apqb,cpdq->abcd", g_exchange, rdm2_full, optimize=optimize)
+    # X and Y are gathered with the same index patterns, so they are combined before gathering.
+    XY = 2 * X + Y
+    # Occupied indices are clipped once and shared by all gathers,
+    # elements with a virtual index in the occupied positions are masked out.
+    t_all, u_all, m_all, n_all = (xp.asarray(idx) for idx in (t, u, m, n))
+    t_occ, u_occ, m_occ, n_occ = (xp.minimum(idx, num_occ - 1) for idx in (t_all, u_all, m_all, n_all))
+    mask_mu = (m_all < num_occ) & (u_all < num_occ)
+    mask_tn = (t_all < num_occ) & (n_all < num_occ)
+    mask_mt = (m_all < num_occ) & (t_all < num_occ)
+    mask_nu = (n_all < num_occ) & (u_all < num_occ)
+    A2e = mask_mu * (XY[n_all, t_all, m_occ, u_occ] + Y[t_all, n_all, u_occ, m_occ])
+    A2e += mask_tn * (XY[u_all, m_all, t_occ, n_occ] + Y[m_all, u_all, n_occ, t_occ])
+    A2e -= 2 * mask_mt * Z[n_all, u_all, m_occ, t_occ]
+    A2e -= 2 * mask_nu * Z[m_all, t_all, n_occ, u_occ]
+    if use_gpu:
+        A2e = A2e.get()
+    # Kronecker delta contributions
+    # The 1e and 2e terms with m = u, or t = n, collapse to the generalized Fock matrix.
+    fock = get_generalized_fock_matrix(h, g, num_inactive_orbs, num_active_orbs, rdm1, rdm2, dtype=dtype)
+    A_delta = (m == u) * fock[n, t] + (t == n) * fock[m, u]
+    return 1 / 2 * A1e + 1 / 4 * A2e - 1 / 4 * A_delta
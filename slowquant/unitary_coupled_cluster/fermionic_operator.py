@@ -105,7 +105,7 @@ def do_extended_normal_ordering(
 
 
 class FermionicOperator:
-    __slots__ = ("operators",)
+    __slots__ = ("__weakref__", "operators")
 
     def __init__(
         self,
@@ -1,9 +1,11 @@
 import math
-from collections.abc import Sequence
+import weakref
+from collections.abc import Callable, Sequence
 
 import numba as nb
 import numpy as np
 import scipy.sparse as ss
+from numba.extending import intrinsic
 
 from slowquant.unitary_coupled_cluster.ci_spaces import CI_Info
 from slowquant.unitary_coupled_cluster.fermionic_operator import FermionicOperator
@@ -20,12 +22,33 @@ from slowquant.unitary_coupled_cluster.operators import (
 from slowquant.unitary_coupled_cluster.util import UccStructure, UpsStructure
 
 
+@intrinsic
+def _ctpop(typingctx, x):
+    """Count number of ones in an integer using the LLVM ctpop intrinsic.
+
+    Args:
+        typingctx: Numba typing context.
+        x: Numba type of the integer.
+
+    Returns:
+        Signature and code generator.
+    """
+    if not isinstance(x, nb.types.Integer):
+        return None
+    sig = nb.types.int64(x)
+
+    def codegen(context, builder, signature, args):
+        val = context.cast(builder, args[0], signature.args[0], nb.types.int64)
+        return builder.ctpop(val)
+
+    return sig, codegen
+
+
 @nb.jit(nopython=True)
 def bitcount(x: int) -> int:
     """Count number of ones in binary representation of an integer.
 
-    Implementaion of Brian Kernighan algorithm,
-    https://graphics.stanford.edu/~seander/bithacks.html#CountBitsSetKernighan
+    Lowers to a single population count instruction on hardware that supports it.
 
     Args:
         x: Integer.
@@ -33,241 +56,402 @@ def bitcount(x: int) -> int:
     Returns:
         Number of ones in the binary.
     """
-    b = 0
-    while x > 0:
-        x &= x - 1
-        b += 1
-    return b
+    return _ctpop(x)
 
 
-@nb.jit(nopython=True)
+@nb.jit(nopython=True, inline="always")
+def phase_sign(phase_changes: int) -> int:
+    """Get sign of a number of phase changes, i.e., (-1)**phase_changes without branching.
+
+    Args:
+        phase_changes: Number of phase changes.
+
+    Returns:
+        1 for an even and -1 for an odd number of phase changes.
+    """
+    return 1 - 2 * (phase_changes & 1)
+
+
+@nb.jit(nopython=True, inline="always")
+def det2idx_lookup(det: int, sorted_dets: np.ndarray, sorted_det_idxs: np.ndarray) -> int:
+    """Find index of determinant using binary search.
+
+    Args:
+        det: Determinant.
+        sorted_dets: Determinants in ascending order.
+        sorted_det_idxs: Index of each determinant in sorted_dets.
+
+    Returns:
+        Index of determinant, -1 if the determinant is not in the space.
+    """
+    pos = np.searchsorted(sorted_dets, det)
+    if pos == len(sorted_dets) or sorted_dets[pos] != det:
+        return -1
+    return sorted_det_idxs[pos]
+
+
+def get_operator_string_masks(
+    anni_idxs: Sequence[int], create_idxs: Sequence[int], num_active_orbs: int
+) -> tuple[int, int, int, int, int] | None:
+    """Get bitmasks that describe the action of a string of annihilation and creation operators.
+
+    The annihilation operators are applied first, then the creation operators,
+    both in reversed order.
+    Which spin orbitals are checked and flipped is the same for all determinants,
+    and the phase is the parity of the occupied spin orbitals in a fixed mask,
+    since the occupation of the spin orbitals touched earlier in the string is known.
+
+    Args:
+        anni_idxs: Indicies for annihilation operators.
+        create_idxs: Indicies for creation operators.
+        num_active_orbs: Number of active spatial orbitals.
+
+    Returns:
+        Bitmask of spin orbitals that must be occupied, bitmask of spin orbitals that must be unoccupied,
+        bitmask of flipped spin orbitals, bitmask for the phase, and the constant number of phase changes.
+        None if the string kills all determinants.
+        If the string creates in a spin orbital outside the determinant space,
+        the flip bitmask has a bit set above the determinant space.
+    """
+    num_spin_orbs = 2 * num_active_orbs
+    occ_mask = 0
+    unocc_mask = 0
+    touched_mask = 0
+    flip_mask = 0
+    parity_mask = 0
+    parity_offset = 0
+    is_outside = False
+    for orb_idx, is_creation in [(idx, False) for idx in anni_idxs[::-1]] + [
+        (idx, True) for idx in create_idxs[::-1]
+    ]:
+        if not 0 <= orb_idx < num_spin_orbs:
+            if not is_creation:
+                # Spin orbitals outside the determinant space are unoccupied.
+                return None
+            # Flip a bit above the determinant space,
+            # such that determinants reaching this operator are not found in the CI space.
+            is_outside = True
+            continue
+        bit = 1 << (num_spin_orbs - 1 - orb_idx)
+        if not touched_mask & bit:
+            # The first operator on a spin orbital determines the required occupation.
+            if is_creation:
+                unocc_mask |= bit
+            else:
+                occ_mask |= bit
+            touched_mask |= bit
+        else:
+            is_occupied = bool(occ_mask & bit) != bool(flip_mask & bit)
+            if is_occupied == is_creation:
+                # Annihilation of an unoccupied or creation of an occupied spin orbital.
+                return None
+        flip_mask ^= bit
+        # Spin orbitals before orb_idx, counted after applying the operator.
+        before_mask = ((1 << num_spin_orbs) - 1) ^ ((1 << (num_spin_orbs - orb_idx)) - 1)
+        parity_mask ^= before_mask & ~touched_mask
+        # Occupation of touched spin orbitals is known: occupied if required occupied and not flipped,
+        # or required unoccupied and flipped.
+        known_occ = (occ_mask & ~flip_mask) | (unocc_mask & flip_mask)
+        parity_offset += (before_mask & known_occ).bit_count()
+    if is_outside:
+        flip_mask |= 1 << num_spin_orbs
+    return occ_mask, unocc_mask, flip_mask, parity_mask, parity_offset % 2
+
+
+def get_operator_masks(
+    op: FermionicOperator, num_active_orbs: int, do_unsafe: bool = False
+) -> tuple[np.ndarray, np.ndarray]:
+    """Get bitmasks and factors of all annihilation and creation strings in an operator.
+
+    Strings that kill all determinants are left out.
+
+    Args:
+        op: Fermionic operator.
+        num_active_orbs: Number of active spatial orbitals.
+        do_unsafe: Leave out strings that create in spin orbitals outside the space. (default: False)
+                If not left out, such a string will stop the calculation when it does not kill a determinant.
+
+    Returns:
+        Bitmasks, one row per string, see :func:`get_operator_string_masks`, and factors of the strings.
+    """
+    masks = []
+    factors = []
+    # loop over all strings of annihilation operators in FermionicOperator sum
+    for fermi_label, factor in op.operators.items():
+        # Separate each annihilation operator string in creation and annihilation indices
+        anni_idx = [orb_idx for orb_idx, dagger in fermi_label if not dagger]
+        create_idx = [orb_idx for orb_idx, dagger in fermi_label if dagger]
+        label_masks = get_operator_string_masks(anni_idx, create_idx, num_active_orbs)
+        if label_masks is None:
+            continue
+        if do_unsafe and label_masks[2] >> 2 * num_active_orbs:
+            # All determinants reaching the string end up outside the space.
+            continue
+        masks.append(label_masks)
+        factors.append(factor)
+    return np.array(masks, dtype=np.int64).reshape(-1, 5), np.array(factors, dtype=np.float64)
+
+
+# Folded bitmasks and factors of operators, keyed on the operator.
+# Every entry also holds a snapshot of the operator strings, such that inplace changes of the operator are detected.
+_folded_masks_cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_folded_operator_masks(
+    op: FermionicOperator,
+    num_inactive_orbs: int,
+    num_active_orbs: int,
+    num_virtual_orbs: int,
+    do_folding: bool = True,
+    *,
+    do_unsafe: bool = False,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Get bitmasks and factors of the (folded) operator.
+
+    The result is cached on the operator, such that repeated propagations with the same operator
+    only do the folding and string parsing once.
+
+    Args:
+        op: Fermionic operator.
+        num_inactive_orbs: Number of inactive spatial orbitals.
+        num_active_orbs: Number of active spatial orbitals.
+        num_virtual_orbs: Number of virtual spatial orbitals.
+        do_folding: Do folding of operator (default: True).
+        do_unsafe: Leave out strings that create in spin orbitals outside the space. (default: False)
+                If not left out, such a string will stop the calculation when it does not kill a determinant.
+
+    Returns:
+        Bitmasks and factors, see :func:`get_operator_masks`.
+    """
+    key = (num_inactive_orbs, num_active_orbs, num_virtual_orbs, do_folding, do_unsafe)
+    op_cache = _folded_masks_cache.setdefault(op, {})
+    if key in op_cache:
+        operators, masks, factors = op_cache[key]
+        if operators == op.operators:
+            return masks, factors
+    if do_folding:
+        op_folded = op.get_folded_operator(num_inactive_orbs, num_active_orbs, num_virtual_orbs)
+    else:
+        op_folded = op
+    masks, factors = get_operator_masks(op_folded, num_active_orbs, do_unsafe)
+    op_cache[key] = (dict(op.operators), masks, factors)
+    return masks, factors
+
+
+@nb.jit(nopython=True, parallel=True)
 def apply_operator(
     state: np.ndarray,
-    anni_idxs: np.ndarray,
-    create_idxs: np.ndarray,
-    num_active_orbs: int,
-    parity_check: np.ndarray,
+    non_zero_idxs: np.ndarray,
+    masks: np.ndarray,
+    factors: np.ndarray,
     idx2det: np.ndarray,
-    det2idx: dict[int, int],
+    sorted_dets: np.ndarray,
+    sorted_det_idxs: np.ndarray,
     do_unsafe: bool,
     tmp_state: np.ndarray,
-    factor: float,
 ) -> np.ndarray:
     """Apply operator to state for a single state wave function.
 
     This part is outside of propagate_state for performance reasons,
     i.e., Numba JIT.
 
+    Every string is described by a fixed number of bitmasks,
+    so the work per determinant does not depend on the number of operators in the string.
+
     Args:
         state: Original state.
-        anni_idxs: Indicies for annihilation operators.
-        create_idxs: Indicies for creation operators.
-        num_active_orbs: Number of active spatial orbitals.
-        parity_check: Array used to check the parity when an operator is applied.
+        non_zero_idxs: Indices of the determinants with a non-zero amplitude.
+        masks: Bitmasks of the annihilation and creation strings, see :func:`get_operator_masks`.
+        factors: Factors in front of the strings.
         idx2det: Maps index to determinant.
-        det2idx: Maps determinant to index.
+        sorted_dets: Determinants in ascending order.
+        sorted_det_idxs: Index of each determinant in sorted_dets.
         do_unsafe: Do unsafe.
         tmp_state: New state.
-        factor: Factor in front of operator.
 
     Returns:
         New state.
     """
-    anni_idxs = anni_idxs[::-1]
-    create_idxs = create_idxs[::-1]
-    # loop over all determinants in new_state
-    for i, det in enumerate(idx2det):
-        if abs(state[i]) < 10**-14:
-            continue
-        phase_changes = 0
-        is_killstate = False
-        # evaluate how string of annihilation operator change det
-        for orb_idx in anni_idxs:
-            if (det >> 2 * num_active_orbs - 1 - orb_idx) & 1 == 0:
-                # If an annihilation operator works on zero, then we reach kill-state.
-                is_killstate = True
-                break
-            det = det ^ (1 << (2 * num_active_orbs - 1 - orb_idx))
-            # take care of phases using parity_check
-            phase_changes += bitcount(det & parity_check[orb_idx])
-        if is_killstate:
-            continue
-        for orb_idx in create_idxs:
-            if (det >> 2 * num_active_orbs - 1 - orb_idx) & 1 == 1:
-                # If creation operator works on one, then we reach kill-state.
-                is_killstate = True
-                break
-            det = det ^ (1 << (2 * num_active_orbs - 1 - orb_idx))
-            # take care of phases using parity_check
-            phase_changes += bitcount(det & parity_check[orb_idx])
-        if is_killstate:
-            continue
-        if do_unsafe:
-            # For some algorithms it is guaranteed that the application of operators will always
-            # keep the new determinants within a pre-defined space (in det2idx and idx2det).
-            # For these algorithms it is a sign of bug if a keyerror when calling det2idx is found.
-            # These algorithms thus does also not need to check for the exsistence of the new determinant
-            # in det2idx.
-            # For other algorithms this 'safety' is not guaranteed, hence the keyword is called 'do_unsafe'.
-            if det not in det2idx:
+    num_outside = 0
+    for label in range(len(factors)):
+        occ_mask = masks[label, 0]
+        unocc_mask = masks[label, 1]
+        flip_mask = masks[label, 2]
+        parity_mask = masks[label, 3]
+        parity_offset = masks[label, 4]
+        factor = factors[label]
+        # loop over all determinants with a non-zero amplitude in new_state
+        # A fixed string of operators maps different determinants to different determinants,
+        # so no two iterations write to the same element.
+        for j in nb.prange(len(non_zero_idxs)):
+            i = non_zero_idxs[j]
+            det = idx2det[i]
+            # If an annihilation operator works on zero or a creation operator works on one,
+            # then we reach kill-state.
+            if det & occ_mask != occ_mask or det & unocc_mask != 0:
+                continue
+            new_i = det2idx_lookup(det ^ flip_mask, sorted_dets, sorted_det_idxs)
+            if new_i == -1:
+                # For some algorithms it is guaranteed that the application of operators will always
+                # keep the new determinants within a pre-defined space (in idx2det).
+                # For these algorithms it is a sign of bug if a determinant outside the space is found,
+                # this is checked after the loop to keep the loop parallel.
+                # For other algorithms this 'safety' is not guaranteed, hence the keyword is called 'do_unsafe'.
+                num_outside += 1
                 continue
-        tmp_state[det2idx[det]] += factor * (-1) ** phase_changes * state[i]
+            phase_changes = bitcount(det & parity_mask) + parity_offset
+            tmp_state[new_i] += factor * phase_sign(phase_changes) * state[i]
+    if num_outside > 0 and not do_unsafe:
+        raise KeyError("Determinant is not in the CI space")
     return tmp_state
 
 
-@nb.jit(nopython=True)
-def add_operator_matrix(
-    op_mat: np.ndarray,
-    anni_idxs: np.ndarray,
-    create_idxs: np.ndarray,
-    num_active_orbs: int,
-    parity_check: np.ndarray,
+@nb.jit(nopython=True, parallel=True)
+def get_operator_matrix_columns(
+    masks: np.ndarray,
+    factors: np.ndarray,
     idx2det: np.ndarray,
-    det2idx: dict[int, int],
+    sorted_dets: np.ndarray,
+    sorted_det_idxs: np.ndarray,
     do_unsafe: bool,
-    factor: float,
-) -> np.ndarray:
-    """Add matrix representation of annihilation string.
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Get the non-zero matrix elements of operator in compressed sparse column format.
 
-    This part is outside of propagate_state for performance reasons,
+    Elements from different strings with the same row and column are not summed.
+
+    This part is outside of build_operator_matrix for performance reasons,
     i.e., Numba JIT.
 
     Args:
-        op_mat: Matrix representation of operator.
-        anni_idxs: Indicies for annihilation operators.
-        create_idxs: Indicies for creation operators.
-        num_active_orbs: Number of active spatial orbitals.
-        parity_check: Array used to check the parity when an operator is applied.
+        masks: Bitmasks of the annihilation and creation strings, see :func:`get_operator_masks`.
+        factors: Factors in front of the strings.
         idx2det: Maps index to determinant.
-        det2idx: Maps determinant to index.
+        sorted_dets: Determinants in ascending order.
+        sorted_det_idxs: Index of each determinant in sorted_dets.
         do_unsafe: Do unsafe.
-        factor: Factor in front of operator.
 
     Returns:
-        Operator matrix.
+        Column pointers, row indices, and values of the non-zero elements.
     """
-    anni_idxs = anni_idxs[::-1]
-    create_idxs = create_idxs[::-1]
-    # loop over all determinants in new_state
-    for i, det in enumerate(idx2det):
-        phase_changes = 0
-        is_killstate = False
-        # evaluate how string of annihilation operator change det
-        for orb_idx in anni_idxs:
-            if (det >> 2 * num_active_orbs - 1 - orb_idx) & 1 == 0:
-                # If an annihilation operator works on zero, then we reach kill-state.
-                is_killstate = True
-                break
-            det = det ^ (1 << (2 * num_active_orbs - 1 - orb_idx))
-            # take care of phases using parity_check
-            phase_changes += bitcount(det & parity_check[orb_idx])
-        if is_killstate:
-            continue
-        for orb_idx in create_idxs:
-            if (det >> 2 * num_active_orbs - 1 - orb_idx) & 1 == 1:
-                # If creation operator works on one, then we reach kill-state.
-                is_killstate = True
-                break
-            det = det ^ (1 << (2 * num_active_orbs - 1 - orb_idx))
-            # take care of phases using parity_check
-            phase_changes += bitcount(det & parity_check[orb_idx])
-        if is_killstate:
-            continue
-        if do_unsafe:
+    num_dets = len(idx2det)
+    col_counts = np.zeros(num_dets + 1, dtype=np.int64)
+    # Count the strings that do not kill each determinant, i.e., the elements in each column.
+    # Every column is handled by one iteration, so the loops over determinants are race-free.
+    for i in nb.prange(num_dets):
+        det = idx2det[i]
+        count = 0
+        for label in range(len(factors)):
+            # If an annihilation operator works on zero or a creation operator works on one,
+            # then we reach kill-state.
+            if det & masks[label, 0] == masks[label, 0] and det & masks[label, 1] == 0:
+                count += 1
+        col_counts[i + 1] = count
+    indptr = np.cumsum(col_counts)
+    indices = np.empty(indptr[-1], dtype=np.int64)
+    data = np.empty(indptr[-1])
+    num_outside = 0
+    for i in nb.prange(num_dets):
+        det = idx2det[i]
+        pos = indptr[i]
+        for label in range(len(factors)):
+            if det & masks[label, 0] != masks[label, 0] or det & masks[label, 1] != 0:
+                continue
+            new_i = det2idx_lookup(det ^ masks[label, 2], sorted_dets, sorted_det_idxs)
+            if new_i == -1:
+                num_outside += 1
+            phase_changes = bitcount(det & masks[label, 3]) + masks[label, 4]
+            indices[pos] = new_i
+            data[pos] = factors[label] * phase_sign(phase_changes)
+            pos += 1
+    if num_outside > 0:
+        if not do_unsafe:
             # For some algorithms it is guaranteed that the application of operators will always
-            # keep the new determinants within a pre-defined space (in det2idx and idx2det).
-            # For these algorithms it is a sign of bug if a keyerror when calling det2idx is found.
-            # These algorithms thus does also not need to check for the exsistence of the new determinant
-            # in det2idx.
+            # keep the new determinants within a pre-defined space (in idx2det).
+            # For these algorithms it is a sign of bug if a determinant outside the space is found.
             # For other algorithms this 'safety' is not guaranteed, hence the keyword is called 'do_unsafe'.
-            if det not in det2idx:
-                continue
-        op_mat[det2idx[det], i] += factor * (-1) ** phase_changes
-    return op_mat
-
-
-@nb.jit(nopython=True)
+            raise KeyError("Determinant is not in the CI space")
+        # Remove the elements of determinants outside the space.
+        is_inside = indices != -1
+        for i in range(num_dets):
+            col_counts[i + 1] = np.sum(is_inside[indptr[i] : indptr[i + 1]])
+        indptr = np.cumsum(col_counts)
+        indices = indices[is_inside]
+        data = data[is_inside]
+    return indptr, indices, data
+
+
+@nb.jit(nopython=True, parallel=True)
 def apply_operator_SA(
     state: np.ndarray,
-    anni_idxs: np.ndarray,
-    create_idxs: np.ndarray,
-    num_active_orbs: int,
-    parity_check: np.ndarray,
+    non_zero_idxs: np.ndarray,
+    masks: np.ndarray,
+    factors: np.ndarray,
     idx2det: np.ndarray,
-    det2idx: dict[int, int],
+    sorted_dets: np.ndarray,
+    sorted_det_idxs: np.ndarray,
     do_unsafe: bool,
     tmp_state: np.ndarray,
-    factor: float,
 ) -> np.ndarray:
     """Apply operator to state for a state-averaged wave function.
 
     This part is outside of propagate_state for performance reasons,
     i.e., Numba JIT.
 
+    The states are stored with the determinant index first, (num_dets, num_states),
+    such that the amplitudes of a determinant are contiguous in memory.
+
     Args:
         state: Original state.
-        anni_idxs: Indicies for annihilation operators.
-        create_idxs: Indicies for creation operators.
-        num_active_orbs: Number of active spatial orbitals.
-        parity_check: Array used to check the parity when an operator is applied.
+        non_zero_idxs: Indices of the determinants with a non-zero amplitude in any of the states.
+        masks: Bitmasks of the annihilation and creation strings, see :func:`get_operator_masks`.
+        factors: Factors in front of the strings.
         idx2det: Maps index to determinant.
-        det2idx: Maps determinant to index.
+        sorted_dets: Determinants in ascending order.
+        sorted_det_idxs: Index of each determinant in sorted_dets.
         do_unsafe: Do unsafe.
         tmp_state: New state.
-        factor: Factor in front of operator.
 
     Returns:
         New state.
     """
-    anni_idxs = anni_idxs[::-1]
-    create_idxs = create_idxs[::-1]
-    # loop over all determinants in new_state
-    for i, det in enumerate(idx2det):
-        is_non_zero = False
-        for val in state[:, i]:
-            if abs(val) > 10**-14:
-                is_non_zero = True
-                break
-        if not is_non_zero:
-            continue
-        phase_changes = 0
-        is_killstate = False
-        # evaluate how string of annihilation operator change det
-        for orb_idx in anni_idxs:
-            if (det >> 2 * num_active_orbs - 1 - orb_idx) & 1 == 0:
-                # If an annihilation operator works on zero, then we reach kill-state.
-                is_killstate = True
-                break
-            det = det ^ (1 << (2 * num_active_orbs - 1 - orb_idx))
-            # take care of phases using parity_check
-            phase_changes += bitcount(det & parity_check[orb_idx])
-        if is_killstate:
-            continue
-        for orb_idx in create_idxs:
-            if (det >> 2 * num_active_orbs - 1 - orb_idx) & 1 == 1:
-                # If creation operator works on one, then we reach kill-state.
-                is_killstate = True
-                break
-            det = det ^ (1 << (2 * num_active_orbs - 1 - orb_idx))
-            # take care of phases using parity_check
-            phase_changes += bitcount(det & parity_check[orb_idx])
-        if is_killstate:
-            continue
-        if do_unsafe:
-            # For some algorithms it is guaranteed that the application of operators will always
-            # keep the new determinants within a pre-defined space (in det2idx and idx2det).
-            # For these algorithms it is a sign of bug if a keyerror when calling det2idx is found.
-            # These algorithms thus does also not need to check for the exsistence of the new determinant
-            # in det2idx.
-            # For other algorithms this 'safety' is not guaranteed, hence the keyword is called 'do_unsafe'.
-            if det not in det2idx:
+    num_states = state.shape[1]
+    num_outside = 0
+    for label in range(len(factors)):
+        occ_mask = masks[label, 0]
+        unocc_mask = masks[label, 1]
+        flip_mask = masks[label, 2]
+        parity_mask = masks[label, 3]
+        parity_offset = masks[label, 4]
+        factor = factors[label]
+        # loop over all determinants with a non-zero amplitude in new_state
+        # A fixed string of operators maps different determinants to different determinants,
+        # so no two iterations write to the same element.
+        for j in nb.prange(len(non_zero_idxs)):
+            i = non_zero_idxs[j]
+            det = idx2det[i]
+            # If an annihilation operator works on zero or a creation operator works on one,
+            # then we reach kill-state.
+            if det & occ_mask != occ_mask or det & unocc_mask != 0:
                 continue
-        val = factor * (-1) ** phase_changes
-        tmp_state[:, det2idx[det]] += val * state[:, i]  # Update value
+            new_i = det2idx_lookup(det ^ flip_mask, sorted_dets, sorted_det_idxs)
+            if new_i == -1:
+                # For some algorithms it is guaranteed that the application of operators will always
+                # keep the new determinants within a pre-defined space (in idx2det).
+                # For these algorithms it is a sign of bug if a determinant outside the space is found,
+                # this is checked after the loop to keep the loop parallel.
+                # For other algorithms this 'safety' is not guaranteed, hence the keyword is called 'do_unsafe'.
+                num_outside += 1
+                continue
+            phase_changes = bitcount(det & parity_mask) + parity_offset
+            val = factor * phase_sign(phase_changes)
+            for k in range(num_states):
+                tmp_state[new_i, k] += val * state[i, k]  # Update value
+    if num_outside > 0 and not do_unsafe:
+        raise KeyError("Determinant is not in the CI space")
     return tmp_state
 
 
-def build_operator_matrix(op: FermionicOperator, ci_info: CI_Info, do_unsafe: bool = False) -> np.ndarray:
+def build_operator_matrix(op: FermionicOperator, ci_info: CI_Info, do_unsafe: bool = False) -> ss.csr_matrix:
     """Build matrix representation of operator.
 
     Args:
@@ -277,43 +461,27 @@ def build_operator_matrix(op: FermionicOperator, ci_info: CI_Info, do_unsafe: bo
                 If not ignored, getting elements outside the space will stop the calculation.
 
     Returns:
-        Matrix representation of operator.
+        Sparse matrix representation of operator.
     """
     idx2det = ci_info.idx2det
-    det2idx = ci_info.det2idx
-    num_active_orbs = ci_info.num_active_orbs
+    sorted_dets = ci_info.sorted_dets
+    sorted_det_idxs = ci_info.sorted_det_idxs
     num_dets = len(idx2det)  # number of spin and particle conserving determinants
-    op_mat = np.zeros((num_dets, num_dets))  # basis
-    # Create bitstrings for parity check. Contains occupied determinant up to orbital index.
-    parity_check = np.zeros(2 * num_active_orbs + 1, dtype=int)
-    num = 0
-    for i in range(2 * num_active_orbs - 1, -1, -1):
-        num += 2**i
-        parity_check[2 * num_active_orbs - i] = num
-    # loop over all strings of annihilation operators in FermionicOperator sum
-    for fermi_label in op.operators.keys():
-        # Separate each annihilation operator string in creation and annihilation indices
-        anni_idx = []
-        create_idx = []
-        for fermi_op in fermi_label:
-            if fermi_op[1]:
-                create_idx.append(fermi_op[0])
-            else:
-                anni_idx.append(fermi_op[0])
-        anni_idx = np.array(anni_idx, dtype=np.int64)
-        create_idx = np.array(create_idx, dtype=np.int64)
-        op_mat = add_operator_matrix(
-            op_mat,
-            anni_idx,
-            create_idx,
-            num_active_orbs,
-            parity_check,
-            idx2det,
-            det2idx,
-            do_unsafe,
-            op.operators[fermi_label],
-        )
-    return op_mat
+    masks, factors = get_folded_operator_masks(
+        op,
+        ci_info.num_inactive_orbs,
+        ci_info.num_active_orbs,
+        ci_info.num_virtual_orbs,
+        do_folding=False,
+        do_unsafe=do_unsafe,
+    )
+    indptr, indices, data = get_operator_matrix_columns(
+        masks, factors, idx2det, sorted_dets, sorted_det_idxs, do_unsafe
+    )
+    op_mat = ss.csc_matrix((data, indices, indptr), shape=(num_dets, num_dets))
+    # Duplicate elements from different annihilation strings are summed.
+    op_mat.sum_duplicates()
+    return op_mat.tocsr()
 
 
 def propagate_state(
@@ -324,6 +492,7 @@ def propagate_state(
     wf_struct: UpsStructure | UccStructure | None = None,
     do_folding: bool = True,
     do_unsafe: bool = False,
+    out: np.ndarray | None = None,
 ) -> np.ndarray:
     r"""Propagate state by applying operators.
 
@@ -344,26 +513,28 @@ def propagate_state(
         do_folding: Do folding of operator (default: True).
         do_unsafe: Ignore elements that are outside the space defined in ci_info. (default: False)
                 If not ignored, getting elements outside the space will stop the calculation.
+        out: Array the new state is written to, must not share memory with state (default: None).
 
     Returns:
         New state.
     """
     idx2det = ci_info.idx2det
-    det2idx = ci_info.det2idx
+    sorted_dets = ci_info.sorted_dets
+    sorted_det_idxs = ci_info.sorted_det_idxs
     num_inactive_orbs = ci_info.num_inactive_orbs
     num_active_orbs = ci_info.num_active_orbs
     num_virtual_orbs = ci_info.num_virtual_orbs
     if len(operators) == 0:
-        return np.copy(state)
-    new_state = np.copy(state)
-    tmp_state = np.zeros_like(state)
-    # Create bitstrings for parity check. Contains occupied determinant up to orbital index.
-    parity_check = np.zeros(2 * num_active_orbs + 1, dtype=np.int64)
-    num = 0
-    for i in range(2 * num_active_orbs - 1, -1, -1):
-        num += 2**i
-        parity_check[2 * num_active_orbs - i] = num
-    for op in operators[::-1]:
+        if out is None:
+            return np.copy(state)
+        out[:] = state
+        return out
+    # The input state is only read.
+    # Two buffers are swapped after each operator, such that the state is never copied,
+    # and the last operator writes directly to out.
+    new_state = state
+    spare_state = None
+    for i, op in enumerate(reversed(operators)):
         # Ansatz unitary in operators
         if isinstance(op, str):
             if op not in ("U", "Ud"):
@@ -395,37 +566,35 @@ def propagate_state(
                 raise TypeError(f"Got unknown wave function structure type, {type(wf_struct)}")
         # FermionicOperator in operators
         else:
+            if out is not None and i == len(operators) - 1:
+                tmp_state = out
+            elif spare_state is not None:
+                tmp_state = spare_state
+            else:
+                tmp_state = np.empty_like(state)
             tmp_state[:] = 0.0
             # Fold operator to only get active contributions
-            if do_folding:
-                op_folded = op.get_folded_operator(num_inactive_orbs, num_active_orbs, num_virtual_orbs)
-            else:
-                op_folded = op
-            # loop over all strings of annihilation operators in FermionicOperator sum
-            for fermi_label in op_folded.operators.keys():
-                # Separate each annihilation operator string in creation and annihilation indices
-                anni_idx = []
-                create_idx = []
-                for fermi_op in fermi_label:
-                    if fermi_op[1]:
-                        create_idx.append(fermi_op[0])
-                    else:
-                        anni_idx.append(fermi_op[0])
-                anni_idx = np.array(anni_idx, dtype=np.int64)
-                create_idx = np.array(create_idx, dtype=np.int64)
-                tmp_state = apply_operator(
-                    new_state,
-                    anni_idx,
-                    create_idx,
-                    num_active_orbs,
-                    parity_check,
-                    idx2det,
-                    det2idx,
-                    do_unsafe,
-                    tmp_state,
-                    op_folded.operators[fermi_label],
-                )
-            new_state = np.copy(tmp_state)
+            masks, factors = get_folded_operator_masks(
+                op, num_inactive_orbs, num_active_orbs, num_virtual_orbs, do_folding, do_unsafe=do_unsafe
+            )
+            # Determinants with zero amplitude do not contribute.
+            non_zero_idxs = np.flatnonzero(np.abs(new_state) >= 10**-14)
+            tmp_state = apply_operator(
+                new_state,
+                non_zero_idxs,
+                masks,
+                factors,
+                idx2det,
+                sorted_dets,
+                sorted_det_idxs,
+                do_unsafe,
+                tmp_state,
+            )
+            spare_state = None if new_state is state else new_state
+            new_state = tmp_state
+    if out is not None and new_state is not out:
+        out[:] = new_state
+        return out
     return new_state
 
 
@@ -437,6 +606,7 @@ def propagate_state_SA(
     wf_struct: UpsStructure | None = None,
     do_folding: bool = True,
     do_unsafe: bool = False,
+    out: np.ndarray | None = None,
 ) -> np.ndarray:
     r"""Propagate state by applying operator.
 
@@ -457,26 +627,27 @@ def propagate_state_SA(
         do_folding: Do folding of operator (default: True).
         do_unsafe: Ignore elements that are outside the space defined in ci_info. (default: False)
                 If not ignored, getting elements outside the space will stop the calculation.
+        out: Array the new state is written to, must not share memory with state (default: None).
 
     Returns:
         New state.
     """
     idx2det = ci_info.idx2det
-    det2idx = ci_info.det2idx
+    sorted_dets = ci_info.sorted_dets
+    sorted_det_idxs = ci_info.sorted_det_idxs
     num_inactive_orbs = ci_info.num_inactive_orbs
     num_active_orbs = ci_info.num_active_orbs
     num_virtual_orbs = ci_info.num_virtual_orbs
     if len(operators) == 0:
-        return np.copy(state)
-    new_state = np.copy(state)
-    tmp_state = np.zeros_like(state)
-    # Create bitstrings for parity check. Contains occupied determinant up to orbital index.
-    parity_check = np.zeros(2 * num_active_orbs + 1, dtype=int)
-    num = 0
-    for i in range(2 * num_active_orbs - 1, -1, -1):
-        num += 2**i
-        parity_check[2 * num_active_orbs - i] = num
-    for op in operators[::-1]:
+        if out is None:
+            return np.copy(state)
+        out[:] = state
+        return out
+    # apply_operator_SA works on the transposed states, (num_dets, num_states).
+    # Two buffers that are swapped after each operator, such that the states are never copied.
+    new_state_T = np.array(state.T, order="C")
+    tmp_state_T = np.zeros_like(new_state_T)
+    for op in reversed(operators):
         # Ansatz unitary in operators
         if isinstance(op, str):
             if op not in ("U", "Ud"):
@@ -487,49 +658,40 @@ def propagate_state_SA(
             if isinstance(wf_struct, UpsStructure):
                 if thetas is None:
                     raise ValueError("theta must be different from None")
-                new_state = construct_ups_state_SA(
-                    new_state,
+                new_state_T[:] = construct_ups_state_SA(
+                    np.ascontiguousarray(new_state_T.T),
                     ci_info,
                     thetas,
                     wf_struct,
                     dagger=dagger,
-                )
+                ).T
             else:
                 raise TypeError(f"Got unknown wave function structure type, {type(wf_struct)}")
         # FermionicOperator in operators
         else:
-            tmp_state[:] = 0.0
+            tmp_state_T[:] = 0.0
             # Fold operator to only get active contributions
-            if do_folding:
-                op_folded = op.get_folded_operator(num_inactive_orbs, num_active_orbs, num_virtual_orbs)
-            else:
-                op_folded = op
-            # loop over all strings of annihilation operators in FermionicOperator sum
-            for fermi_label in op_folded.operators.keys():
-                # Separate each annihilation operator string in creation and annihilation indices
-                anni_idx = []
-                create_idx = []
-                for fermi_op in fermi_label:
-                    if fermi_op[1]:
-                        create_idx.append(fermi_op[0])
-                    else:
-                        anni_idx.append(fermi_op[0])
-                anni_idx = np.array(anni_idx, dtype=np.int64)
-                create_idx = np.array(create_idx, dtype=np.int64)
-                tmp_state = apply_operator_SA(
-                    new_state,
-                    anni_idx,
-                    create_idx,
-                    num_active_orbs,
-                    parity_check,
-                    idx2det,
-                    det2idx,
-                    do_unsafe,
-                    tmp_state,
-                    op_folded.operators[fermi_label],
-                )
-            new_state = np.copy(tmp_state)
-    return new_state
+            masks, factors = get_folded_operator_masks(
+                op, num_inactive_orbs, num_active_orbs, num_virtual_orbs, do_folding, do_unsafe=do_unsafe
+            )
+            # Determinants with zero amplitude in all states do not contribute.
+            non_zero_idxs = np.flatnonzero(np.max(np.abs(new_state_T), axis=1) > 10**-14)
+            tmp_state_T = apply_operator_SA(
+                new_state_T,
+                non_zero_idxs,
+                masks,
+                factors,
+                idx2det,
+                sorted_dets,
+                sorted_det_idxs,
+                do_unsafe,
+                tmp_state_T,
+            )
+            new_state_T, tmp_state_T = tmp_state_T, new_state_T
+    if out is None:
+        return np.ascontiguousarray(new_state_T.T)
+    out[:] = new_state_T.T
+    return out
 
 
 def expectation_value(
@@ -572,7 +734,7 @@ def expectation_value(
         do_folding=do_folding,
         do_unsafe=do_unsafe,
     )
-    val = bra @ op_ket
+    val = np.dot(bra, op_ket)
     print(op_ket)
     print(bra)
     print(val)
@@ -614,7 +776,8 @@ def expectation_value_SA(
         wf_struct,
         do_folding=do_folding,
     )
-    val = np.einsum("ij,ij->", bra, op_ket)
+    # Sum over states and determinants as one dot product.
+    val = np.dot(bra.ravel(), op_ket.ravel())
     if not isinstance(val, float):
         raise ValueError(f"Calculated expectation value is not a float, got type {type(val)}")
     return val / len(bra)
@@ -649,6 +812,80 @@ def construct_ucc_state(
     return ss.linalg.expm_multiply(Tmat, state, traceA=0.0)
 
 
+# Generators of the excitations in UCC and UPS structures, keyed on the structure.
+# Every entry also holds a snapshot of the excitations, such that changes of the structure are detected.
+_generators_cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def get_ucc_generators(ucc_struct: UccStructure, offset: int = 0) -> list[FermionicOperator]:
+    """Get the anti-Hermitian excitation operators in a UCC structure.
+
+    The operators only depend on the structure, so they are built once and cached.
+
+    Args:
+        ucc_struct: UCCStructure object.
+        offset: Offset needed for extended spaces.
+
+    Returns:
+        Excitation operator of each parameter.
+    """
+    struct_cache = _generators_cache.setdefault(ucc_struct, {})
+    if offset in struct_cache:
+        excitation_operator_type, excitation_indices, generators = struct_cache[offset]
+        if (
+            excitation_operator_type == ucc_struct.excitation_operator_type
+            and excitation_indices == ucc_struct.excitation_indices
+        ):
+            return generators
+    generators = []
+    two_offset = 2 * offset
+    for exc_type, exc_indices in zip(ucc_struct.excitation_operator_type, ucc_struct.excitation_indices):
+        if exc_type == "sa_single":
+            i, a = (x + offset for x in exc_indices)
+            generators.append(G1_sa(i, a, True))
+        elif exc_type == "sa_double_1":
+            i, j, a, b = (x + offset for x in exc_indices)
+            generators.append(G2_sa(i, j, a, b, 1, True))
+        elif exc_type == "sa_double_2":
+            i, j, a, b = (x + offset for x in exc_indices)
+            generators.append(G2_sa(i, j, a, b, 2, True))
+        elif exc_type == "sa_double_3":
+            i, j, a, b = (x + offset for x in exc_indices)
+            generators.append(G2_sa(i, j, a, b, 3, True))
+        elif exc_type == "sa_double_4":
+            i, j, a, b = (x + offset for x in exc_indices)
+            generators.append(G2_sa(i, j, a, b, 4, True))
+        elif exc_type == "sa_double_5":
+            i, j, a, b = (x + offset for x in exc_indices)
+            generators.append(G2_sa(i, j, a, b, 5, True))
+        elif exc_type == "single":
+            i, a = (x + two_offset for x in exc_indices)
+            generators.append(G1(i, a, True))
+        elif exc_type == "double":
+            i, j, a, b = (x + two_offset for x in exc_indices)
+            generators.append(G2(i, j, a, b, True))
+        elif exc_type == "triple":
+            i, j, k, a, b, c = (x + two_offset for x in exc_indices)
+            generators.append(G3(i, j, k, a, b, c, True))
+        elif exc_type == "quadruple":
+            i, j, k, l, a, b, c, d = (x + two_offset for x in exc_indices)
+            generators.append(G4(i, j, k, l, a, b, c, d, True))
+        elif exc_type == "quintuple":
+            i, j, k, l, m, a, b, c, d, e = (x + two_offset for x in exc_indices)
+            generators.append(G5(i, j, k, l, m, a, b, c, d, e, True))
+        elif exc_type == "sextuple":
+            i, j, k, l, m, n, a, b, c, d, e, f = (x + two_offset for x in exc_indices)
+            generators.append(G6(i, j, k, l, m, n, a, b, c, d, e, f, True))
+        else:
+            raise ValueError(f"Got unknown excitation type, {exc_type}")
+    struct_cache[offset] = (
+        list(ucc_struct.excitation_operator_type),
+        list(ucc_struct.excitation_indices),
+        generators,
+    )
+    return generators
+
+
 def get_ucc_T(
     thetas: Sequence[float],
     ucc_struct: UccStructure,
@@ -666,68 +903,165 @@ def get_ucc_T(
         UCC operator.
     """
     # Build up T matrix based on excitations in ucc_struct and given thetas
-    T = FermionicOperator({})
-    for exc_type, exc_indices, theta in zip(
-        ucc_struct.excitation_operator_type, ucc_struct.excitation_indices, thetas
-    ):
+    # The strings are accumulated in a single dict, instead of creating an intermediate operator per excitation.
+    operators: dict[tuple[tuple[int, bool], ...], float] = {}
+    for G, theta in zip(get_ucc_generators(ucc_struct, offset), thetas):
         if abs(theta) < 10**-14:
             continue
+        for op_key, factor in G.operators.items():
+            if op_key in operators:
+                operators[op_key] += theta * factor
+                if abs(operators[op_key]) < 10**-14:
+                    del operators[op_key]
+            else:
+                operators[op_key] = theta * factor
+    return FermionicOperator(operators)
+
+
+@nb.jit(nopython=True, parallel=True)
+def add_scaled_states(
+    state: np.ndarray,
+    factor1: float,
+    state1: np.ndarray,
+    factor2: float,
+    state2: np.ndarray,
+    new_state: np.ndarray,
+) -> np.ndarray:
+    """Add two scaled states to a state in a single pass.
+
+    Same as state + factor1 * state1 + factor2 * state2, without the intermediate arrays.
+    Every element only depends on the same element of the inputs,
+    so new_state can be state itself to do the update in place.
+
+    Args:
+        state: State.
+        factor1: Factor in front of first state.
+        state1: First state.
+        factor2: Factor in front of second state.
+        state2: Second state.
+        new_state: C-contiguous array the result is written to.
+
+    Returns:
+        New state.
+    """
+    new_state_flat = new_state.reshape(-1)
+    state_flat = state.ravel()
+    state1_flat = state1.ravel()
+    state2_flat = state2.ravel()
+    for i in nb.prange(len(new_state_flat)):
+        new_state_flat[i] = state_flat[i] + factor1 * state1_flat[i] + factor2 * state2_flat[i]
+    return new_state
+
+
+def rotate_state(
+    state: np.ndarray,
+    T: FermionicOperator,
+    sin_theta: float,
+    one_minus_cos_theta: float,
+    ci_info: CI_Info,
+    propagator: Callable[..., np.ndarray],
+    buf_T: np.ndarray,
+    buf_TT: np.ndarray,
+    new_state: np.ndarray,
+) -> np.ndarray:
+    r"""Apply the unitary of a generator that fulfills :math:`\hat{T}^3 = -\hat{T}` to a state.
+
+    .. math::
+        \exp\left(\theta\hat{T}\right)\left|0\right> = \left(1 + \sin(\theta)\hat{T} + (1 - \cos(\theta))\hat{T}^2\right)\left|0\right>
+
+    The action of T is reused for T^2.
+    The T^2 term is skipped if its factor is numerically zero.
+
+    Args:
+        state: State.
+        T: Generator.
+        sin_theta: Sine of the angle.
+        one_minus_cos_theta: One minus the cosine of the angle.
+        ci_info: Information about the CI space.
+        propagator: propagate_state or propagate_state_SA.
+        buf_T: Array the action of T is written to.
+        buf_TT: Array the action of T^2 is written to.
+        new_state: Array the new state is written to, can be state itself.
+
+    Returns:
+        New state.
+    """
+    T_state = propagator(
+        [T],
+        state,
+        ci_info,
+        do_folding=False,
+        out=buf_T,
+    )
+    if abs(one_minus_cos_theta) < 10**-14:
+        return add_scaled_states(state, sin_theta, T_state, 0.0, T_state, new_state)
+    TT_state = propagator(
+        [T],
+        T_state,
+        ci_info,
+        do_folding=False,
+        out=buf_TT,
+    )
+    return add_scaled_states(state, sin_theta, T_state, one_minus_cos_theta, TT_state, new_state)
+
+
+def get_ups_generators(ups_struct: UpsStructure, offset: int = 0) -> list[tuple[FermionicOperator, ...]]:
+    """Get the generators of the unitaries in a UPS structure.
+
+    The generators only depend on the structure, so they are built once and cached.
+    Reusing the same operator objects also makes propagate_state reuse their bitmasks.
+
+    Args:
+        ups_struct: UPS structure object.
+        offset: Offset needed for extended spaces.
+
+    Returns:
+        Generators of each unitary, (Ta, Tb, Ta + Tb) for sa_single and (T,) for all other excitations.
+    """
+    struct_cache = _generators_cache.setdefault(ups_struct, {})
+    if offset in struct_cache:
+        excitation_operator_type, excitation_indices, generators = struct_cache[offset]
+        if (
+            excitation_operator_type == ups_struct.excitation_operator_type
+            and excitation_indices == ups_struct.excitation_indices
+        ):
+            return generators
+    generators = []
+    two_offset = 2 * offset
+    for exc_type, exc_indices in zip(ups_struct.excitation_operator_type, ups_struct.excitation_indices):
         if exc_type == "sa_single":
-            (i, a) = np.array(exc_indices) + offset
-            T += theta * G1_sa(i, a, True)
-        elif exc_type == "sa_double_1":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T += theta * G2_sa(i, j, a, b, 1, True)
-        elif exc_type == "sa_double_2":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T += theta * G2_sa(i, j, a, b, 2, True)
-        elif exc_type == "sa_double_3":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T += theta * G2_sa(i, j, a, b, 3, True)
-        elif exc_type == "sa_double_4":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T += theta * G2_sa(i, j, a, b, 4, True)
-        elif exc_type == "sa_double_5":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T += theta * G2_sa(i, j, a, b, 5, True)
+            i, a = (x + offset for x in exc_indices)
+            Ta = G1(i * 2, a * 2, True)
+            Tb = G1(i * 2 + 1, a * 2 + 1, True)
+            generators.append((Ta, Tb, Ta + Tb))
         elif exc_type == "single":
-            (i, a) = np.array(exc_indices) + 2 * offset
-            T += theta * G1(i, a, True)
+            i, a = (x + two_offset for x in exc_indices)
+            generators.append((G1(i, a, True),))
         elif exc_type == "double":
-            (i, j, a, b) = np.array(exc_indices) + 2 * offset
-            T += theta * G2(i, j, a, b, True)
-        elif exc_type == "triple":
-            (i, j, k, a, b, c) = np.array(exc_indices) + 2 * offset
-            T += theta * G3(i, j, k, a, b, c, True)
-        elif exc_type == "quadruple":
-            (i, j, k, l, a, b, c, d) = np.array(exc_indices) + 2 * offset
-            T += theta * G4(i, j, k, l, a, b, c, d, True)
-        elif exc_type == "quintuple":
-            (i, j, k, l, m, a, b, c, d, e) = np.array(exc_indices) + 2 * offset
-            T += theta * G5(i, j, k, l, m, a, b, c, d, e, True)
-        elif exc_type == "sextuple":
-            (i, j, k, l, m, n, a, b, c, d, e, f) = np.array(exc_indices) + 2 * offset
-            T += theta * G6(i, j, k, l, m, n, a, b, c, d, e, f, True)
+            i, j, a, b = (x + two_offset for x in exc_indices)
+            generators.append((G2(i, j, a, b, True),))
+        elif exc_type in ("sa_double_1", "sa_double_2", "sa_double_3", "sa_double_4", "sa_double_5"):
+            i, j, a, b = (x + offset for x in exc_indices)
+            generators.append((G2_sa(i, j, a, b, int(exc_type[-1]), True),))
         else:
             raise ValueError(f"Got unknown excitation type, {exc_type}")
-    return T
+    struct_cache[offset] = (
+        list(ups_struct.excitation_operator_type),
+        list(ups_struct.excitation_indices),
+        generators,
+    )
+    return generators
 
 
-def construct_ups_state(
+def _construct_ups_state(
     state: np.ndarray,
     ci_info: CI_Info,
     thetas: Sequence[float],
     ups_struct: UpsStructure,
-    dagger: bool = False,
+    dagger: bool,
+    propagator: Callable[..., np.ndarray],
 ) -> np.ndarray:
-    r"""Construct unitary product state by applying UPS unitary to reference state.
-
-    .. math::
-        \boldsymbol{U}_N...\boldsymbol{U}_0\left|\nu\right> = \left|\tilde\nu\right>
-
-    #. 10.48550/arXiv.2303.10825, Eq. 15
-    #. 10.48550/arXiv.2505.00883, Eq. 45, 47, and, 49 (SA doubles)
-    #. 10.48550/arXiv.2505.02984, Eq. 35, D1, and, D2 (SA doubles)
+    """Construct unitary product state, see :func:`construct_ups_state`.
 
     Args:
         state: Reference state vector.
@@ -735,141 +1069,117 @@ def construct_ups_state(
         thetas: Ansatz parameters values.
         ups_struct: Unitary product state structure.
         dagger: If true, do dagger unitaries.
+        propagator: propagate_state or propagate_state_SA.
 
     Returns:
         New state vector with unitaries applied.
     """
     out = state.copy()
-    order = 1
+    # Buffers for the action of powers of T, reused by all unitaries.
+    buf_T = np.empty_like(out)
+    buf_TT = np.empty_like(out)
     offset = ci_info.space_extension_offset
+    ups_generators = get_ups_generators(ups_struct, offset)
+    # Only unitaries with a non-zero angle change the state.
+    idxs = np.flatnonzero(np.abs(np.asarray(thetas, dtype=np.float64)) >= 10**-14)
     if dagger:
-        order = -1
+        idxs = idxs[::-1]
     # Loop over all excitation in UPSStructure
-    for exc_type, exc_indices, theta in zip(
-        ups_struct.excitation_operator_type[::order], ups_struct.excitation_indices[::order], thetas[::order]
-    ):
-        if abs(theta) < 10**-14:
-            continue
+    for idx in idxs:
+        exc_type = ups_struct.excitation_operator_type[idx]
+        generators = ups_generators[idx]
+        theta = thetas[idx]
         if dagger:
             theta = -theta
         if exc_type in ("sa_single",):
             A = 1  # 2**(-1/2)
-            (i, a) = np.array(exc_indices) + offset
-            # Create T matrix
-            Ta = G1(i * 2, a * 2, True)
-            Tb = G1(i * 2 + 1, a * 2 + 1, True)
+            Ta, Tb, _ = generators
+            # Ta and Tb share the same angle.
+            sin_theta = math.sin(A * theta)
+            one_minus_cos_theta = 1 - math.cos(A * theta)
             # Analytical application on state vector
-            out = (
-                out
-                + np.sin(A * theta)
-                * propagate_state(
-                    [Ta],
-                    out,
-                    ci_info,
-                    do_folding=False,
-                )
-                + (1 - np.cos(A * theta))
-                * propagate_state(
-                    [Ta, Ta],
-                    out,
-                    ci_info,
-                    do_folding=False,
-                )
+            out = rotate_state(
+                out,
+                Ta,
+                sin_theta,
+                one_minus_cos_theta,
+                ci_info,
+                propagator,
+                buf_T,
+                buf_TT,
+                out,
             )
-            out = (
-                out
-                + np.sin(A * theta)
-                * propagate_state(
-                    [Tb],
-                    out,
-                    ci_info,
-                    do_folding=False,
-                )
-                + (1 - np.cos(A * theta))
-                * propagate_state(
-                    [Tb, Tb],
-                    out,
-                    ci_info,
-                    do_folding=False,
-                )
+            out = rotate_state(
+                out,
+                Tb,
+                sin_theta,
+                one_minus_cos_theta,
+                ci_info,
+                propagator,
+                buf_T,
+                buf_TT,
+                out,
             )
         elif exc_type in ("single", "double", "sa_double_1"):
-            # Create T matrix
-            if exc_type == "single":
-                (i, a) = np.array(exc_indices) + 2 * offset
-                T = G1(i, a, True)
-            elif exc_type == "double":
-                (i, j, a, b) = np.array(exc_indices) + 2 * offset
-                T = G2(i, j, a, b, True)
-            elif exc_type == "sa_double_1":
-                (i, j, a, b) = np.array(exc_indices) + offset
-                T = G2_sa(i, j, a, b, 1, True)
-            else:
-                raise ValueError(f"Got unknown excitation type: {exc_type}")
+            T = generators[0]
             # Analytical application on state vector
-            out = (
-                out
-                + np.sin(theta)
-                * propagate_state(
-                    [T],
-                    out,
-                    ci_info,
-                    do_folding=False,
-                )
-                + (1 - np.cos(theta))
-                * propagate_state(
-                    [T, T],
-                    out,
-                    ci_info,
-                    do_folding=False,
-                )
+            out = rotate_state(
+                out,
+                T,
+                math.sin(theta),
+                1 - math.cos(theta),
+                ci_info,
+                propagator,
+                buf_T,
+                buf_TT,
+                out,
             )
         elif exc_type in ("sa_double_2", "sa_double_3"):
-            if exc_type == "sa_double_2":
-                (i, j, a, b) = np.array(exc_indices) + offset
-                T = G2_sa(i, j, a, b, 2, True)
-            elif exc_type == "sa_double_3":
-                (i, j, a, b) = np.array(exc_indices) + offset
-                T = G2_sa(i, j, a, b, 3, True)
-            else:
-                raise ValueError(f"Got unknown excitation type: {exc_type}")
+            T = generators[0]
             S = (1, math.sqrt(2) / 2)
+            sin_S = [math.sin(s * theta) for s in S]
+            cos_S_minus_one = [math.cos(s * theta) - 1 for s in S]
             k1 = (-1, 2 * math.sqrt(2))
             k3 = (-2, 2 * math.sqrt(2))
             k2 = (1, -4)
             k4 = (2, -4)
-            tmp = propagate_state(
+            tmp = propagator(
                 [T],
                 out,
                 ci_info,
                 do_folding=False,
+                out=buf_T,
             )
-            out += (k1[0] * np.sin(S[0] * theta) + k1[1] * np.sin(S[1] * theta)) * tmp
-            tmp = propagate_state(
+            out += (k1[0] * sin_S[0] + k1[1] * sin_S[1]) * tmp
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_TT,
             )
-            out += (k2[0] * (np.cos(S[0] * theta) - 1) + k2[1] * (np.cos(S[1] * theta) - 1)) * tmp
-            tmp = propagate_state(
+            out += (k2[0] * cos_S_minus_one[0] + k2[1] * cos_S_minus_one[1]) * tmp
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_T,
             )
-            out += (k3[0] * np.sin(S[0] * theta) + k3[1] * np.sin(S[1] * theta)) * tmp
-            tmp = propagate_state(
+            out += (k3[0] * sin_S[0] + k3[1] * sin_S[1]) * tmp
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_TT,
             )
-            out += (k4[0] * (np.cos(S[0] * theta) - 1) + k4[1] * (np.cos(S[1] * theta) - 1)) * tmp
+            out += (k4[0] * cos_S_minus_one[0] + k4[1] * cos_S_minus_one[1]) * tmp
         elif exc_type in ("sa_double_4",):
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 4, True)
+            T = generators[0]
             S = (1, math.sqrt(2), math.sqrt(2) / 2, 1 / 2)  # type: ignore
+            sin_S = [math.sin(s * theta) for s in S]
+            cos_S_minus_one = [math.cos(s * theta) - 1 for s in S]
             k1 = (2 / 3, -math.sqrt(2) / 42, -8 * math.sqrt(2) / 3, 128 / 21)  # type: ignore
             k3 = (13 / 3, -math.sqrt(2) / 6, -44 * math.sqrt(2) / 3, 64 / 3)  # type: ignore
             k5 = (22 / 3, -math.sqrt(2) / 3, -52 * math.sqrt(2) / 3, 64 / 3)  # type: ignore
@@ -878,106 +1188,115 @@ def construct_ups_state(
             k4 = (-13 / 3, 1 / 6, 88 / 3, -128 / 3)  # type: ignore
             k6 = (-22 / 3, 1 / 3, 104 / 3, -128 / 3)  # type: ignore
             k8 = (-8 / 3, 4 / 21, 32 / 3, -256 / 21)  # type: ignore
-            tmp = propagate_state(
+            tmp = propagator(
                 [T],
                 out,
                 ci_info,
                 do_folding=False,
+                out=buf_T,
             )
             out += (
-                k1[0] * np.sin(S[0] * theta)  # type: ignore
-                + k1[1] * np.sin(S[1] * theta)  # type: ignore
-                + k1[2] * np.sin(S[2] * theta)  # type: ignore
-                + k1[3] * np.sin(S[3] * theta)  # type: ignore
+                k1[0] * sin_S[0]  # type: ignore
+                + k1[1] * sin_S[1]  # type: ignore
+                + k1[2] * sin_S[2]  # type: ignore
+                + k1[3] * sin_S[3]  # type: ignore
             ) * tmp
-            tmp = propagate_state(
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_TT,
             )
             out += (
-                k2[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k2[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k2[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k2[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
+                k2[0] * cos_S_minus_one[0]  # type: ignore
+                + k2[1] * cos_S_minus_one[1]  # type: ignore
+                + k2[2] * cos_S_minus_one[2]  # type: ignore
+                + k2[3] * cos_S_minus_one[3]  # type: ignore
             ) * tmp
-            tmp = propagate_state(
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_T,
             )
             out += (
-                k3[0] * np.sin(S[0] * theta)  # type: ignore
-                + k3[1] * np.sin(S[1] * theta)  # type: ignore
-                + k3[2] * np.sin(S[2] * theta)  # type: ignore
-                + k3[3] * np.sin(S[3] * theta)  # type: ignore
+                k3[0] * sin_S[0]  # type: ignore
+                + k3[1] * sin_S[1]  # type: ignore
+                + k3[2] * sin_S[2]  # type: ignore
+                + k3[3] * sin_S[3]  # type: ignore
             ) * tmp
-            tmp = propagate_state(
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_TT,
             )
             out += (
-                k4[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k4[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k4[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k4[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
+                k4[0] * cos_S_minus_one[0]  # type: ignore
+                + k4[1] * cos_S_minus_one[1]  # type: ignore
+                + k4[2] * cos_S_minus_one[2]  # type: ignore
+                + k4[3] * cos_S_minus_one[3]  # type: ignore
             ) * tmp
-            tmp = propagate_state(
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_T,
             )
             out += (
-                k5[0] * np.sin(S[0] * theta)  # type: ignore
-                + k5[1] * np.sin(S[1] * theta)  # type: ignore
-                + k5[2] * np.sin(S[2] * theta)  # type: ignore
-                + k5[3] * np.sin(S[3] * theta)  # type: ignore
+                k5[0] * sin_S[0]  # type: ignore
+                + k5[1] * sin_S[1]  # type: ignore
+                + k5[2] * sin_S[2]  # type: ignore
+                + k5[3] * sin_S[3]  # type: ignore
             ) * tmp
-            tmp = propagate_state(
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_TT,
             )
             out += (
-                k6[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k6[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k6[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k6[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
+                k6[0] * cos_S_minus_one[0]  # type: ignore
+                + k6[1] * cos_S_minus_one[1]  # type: ignore
+                + k6[2] * cos_S_minus_one[2]  # type: ignore
+                + k6[3] * cos_S_minus_one[3]  # type: ignore
             ) * tmp
-            tmp = propagate_state(
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_T,
             )
             out += (
-                k7[0] * np.sin(S[0] * theta)  # type: ignore
-                + k7[1] * np.sin(S[1] * theta)  # type: ignore
-                + k7[2] * np.sin(S[2] * theta)  # type: ignore
-                + k7[3] * np.sin(S[3] * theta)  # type: ignore
+                k7[0] * sin_S[0]  # type: ignore
+                + k7[1] * sin_S[1]  # type: ignore
+                + k7[2] * sin_S[2]  # type: ignore
+                + k7[3] * sin_S[3]  # type: ignore
             ) * tmp
-            tmp = propagate_state(
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_TT,
             )
             out += (
-                k8[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k8[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k8[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k8[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
+                k8[0] * cos_S_minus_one[0]  # type: ignore
+                + k8[1] * cos_S_minus_one[1]  # type: ignore
+                + k8[2] * cos_S_minus_one[2]  # type: ignore
+                + k8[3] * cos_S_minus_one[3]  # type: ignore
             ) * tmp
         elif exc_type in ("sa_double_5",):
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 5, True)
+            T = generators[0]
             S = (math.sqrt(2), math.sqrt(2) / 2, math.sqrt(3) / 3, math.sqrt(3) / 2, math.sqrt(3) / 6)  # type: ignore
+            sin_S = [math.sin(s * theta) for s in S]
+            cos_S_minus_one = [math.cos(s * theta) - 1 for s in S]
             k1 = (  # type: ignore
                 math.sqrt(2) / 1150,
                 8 * math.sqrt(2) / 5,
@@ -1018,1162 +1337,332 @@ def construct_ups_state(
             k6 = (-133 / 1725, -616 / 3, 8154 / 25, 2384 / 75, -8208 / 23)  # type: ignore
             k8 = (-16 / 115, -1216 / 5, 1728 / 5, 224 / 5, -37152 / 115)  # type: ignore
             k10 = (-48 / 575, -384 / 5, 2592 / 25, 384 / 25, -10368 / 115)  # type: ignore
-            tmp = propagate_state(
-                [T],
-                out,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k1[0] * np.sin(S[0] * theta)  # type: ignore
-                + k1[1] * np.sin(S[1] * theta)  # type: ignore
-                + k1[2] * np.sin(S[2] * theta)  # type: ignore
-                + k1[3] * np.sin(S[3] * theta)  # type: ignore
-                + k1[4] * np.sin(S[4] * theta)  # type: ignore
-            ) * tmp
-            tmp = propagate_state(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k2[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k2[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k2[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k2[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-                + k2[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-            ) * tmp
-            tmp = propagate_state(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k3[0] * np.sin(S[0] * theta)  # type: ignore
-                + k3[1] * np.sin(S[1] * theta)  # type: ignore
-                + k3[2] * np.sin(S[2] * theta)  # type: ignore
-                + k3[3] * np.sin(S[3] * theta)  # type: ignore
-                + k3[4] * np.sin(S[4] * theta)  # type: ignore
-            ) * tmp
-            tmp = propagate_state(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k4[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k4[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k4[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k4[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-                + k4[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-            ) * tmp
-            tmp = propagate_state(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k5[0] * np.sin(S[0] * theta)  # type: ignore
-                + k5[1] * np.sin(S[1] * theta)  # type: ignore
-                + k5[2] * np.sin(S[2] * theta)  # type: ignore
-                + k5[3] * np.sin(S[3] * theta)  # type: ignore
-                + k5[4] * np.sin(S[4] * theta)  # type: ignore
-            ) * tmp
-            tmp = propagate_state(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k6[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k6[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k6[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k6[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-                + k6[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-            ) * tmp
-            tmp = propagate_state(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k7[0] * np.sin(S[0] * theta)  # type: ignore
-                + k7[1] * np.sin(S[1] * theta)  # type: ignore
-                + k7[2] * np.sin(S[2] * theta)  # type: ignore
-                + k7[3] * np.sin(S[3] * theta)  # type: ignore
-                + k7[4] * np.sin(S[4] * theta)  # type: ignore
-            ) * tmp
-            tmp = propagate_state(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k8[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k8[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k8[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k8[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-                + k8[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-            ) * tmp
-            tmp = propagate_state(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k9[0] * np.sin(S[0] * theta)  # type: ignore
-                + k9[1] * np.sin(S[1] * theta)  # type: ignore
-                + k9[2] * np.sin(S[2] * theta)  # type: ignore
-                + k9[3] * np.sin(S[3] * theta)  # type: ignore
-                + k9[4] * np.sin(S[4] * theta)  # type: ignore
-            ) * tmp
-            tmp = propagate_state(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k10[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k10[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k10[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k10[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-                + k10[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-            ) * tmp
-        else:
-            raise ValueError(f"Got unknown excitation type, {exc_type}")
-    return out
-
-
-def construct_ups_state_SA(
-    state: np.ndarray,
-    ci_info: CI_Info,
-    thetas: Sequence[float],
-    ups_struct: UpsStructure,
-    dagger: bool = False,
-) -> np.ndarray:
-    r"""Construct unitary product state by applying UPS unitary to reference state.
-
-    .. math::
-        \boldsymbol{U}_N...\boldsymbol{U}_0\left|\nu\right> = \left|\tilde\nu\right>
-
-    #. 10.48550/arXiv.2303.10825, Eq. 15
-    #. 10.48550/arXiv.2505.00883, Eq. 45, 47, and, 49 (SA doubles)
-    #. 10.48550/arXiv.2505.02984, Eq. 35, D1, and, D2 (SA doubles)
-
-    Args:
-        state: Reference state vector.
-        ci_info: Information about the CI space.
-        thetas: Ansatz parameters values.
-        ups_struct: Unitary product state structure.
-        dagger: If true, do dagger unitaries.
-
-    Returns:
-        New state vector with unitaries applied.
-    """
-    out = state.copy()
-    order = 1
-    offset = ci_info.space_extension_offset
-    if dagger:
-        order = -1
-    # Loop over all excitation in UPSStructure
-    for exc_type, exc_indices, theta in zip(
-        ups_struct.excitation_operator_type[::order], ups_struct.excitation_indices[::order], thetas[::order]
-    ):
-        if abs(theta) < 10**-14:
-            continue
-        if dagger:
-            theta = -theta
-        if exc_type in ("sa_single",):
-            A = 1  # 2**(-1/2)
-            (i, a) = np.array(exc_indices) + offset
-            # Create T matrices
-            Ta = G1(i * 2, a * 2, True)
-            Tb = G1(i * 2 + 1, a * 2 + 1, True)
-            # Analytical application on state vector
-            out = (
-                out
-                + np.sin(A * theta)
-                * propagate_state_SA(
-                    [Ta],
-                    out,
-                    ci_info,
-                    do_folding=False,
-                )
-                + (1 - np.cos(A * theta))
-                * propagate_state_SA(
-                    [Ta, Ta],
-                    out,
-                    ci_info,
-                    do_folding=False,
-                )
-            )
-            out = (
-                out
-                + np.sin(A * theta)
-                * propagate_state_SA(
-                    [Tb],
-                    out,
-                    ci_info,
-                    do_folding=False,
-                )
-                + (1 - np.cos(A * theta))
-                * propagate_state_SA(
-                    [Tb, Tb],
-                    out,
-                    ci_info,
-                    do_folding=False,
-                )
-            )
-        elif exc_type in ("single", "double", "sa_double_1"):
-            # Create T matrix
-            if exc_type == "single":
-                (i, a) = np.array(exc_indices) + 2 * offset
-                T = G1(i, a, True)
-            elif exc_type == "double":
-                (i, j, a, b) = np.array(exc_indices) + 2 * offset
-                T = G2(i, j, a, b, True)
-            elif exc_type == "sa_double_1":
-                (i, j, a, b) = np.array(exc_indices) + offset
-                T = G2_sa(i, j, a, b, 1, True)
-            else:
-                raise ValueError(f"Got unknown excitation type: {exc_type}")
-            # Analytical application on state vector
-            out = (
-                out
-                + np.sin(theta)
-                * propagate_state_SA(
-                    [T],
-                    out,
-                    ci_info,
-                    do_folding=False,
-                )
-                + (1 - np.cos(theta))
-                * propagate_state_SA(
-                    [T, T],
-                    out,
-                    ci_info,
-                    do_folding=False,
-                )
-            )
-        elif exc_type in ("sa_double_2", "sa_double_3"):
-            if exc_type == "sa_double_2":
-                (i, j, a, b) = np.array(exc_indices) + offset
-                T = G2_sa(i, j, a, b, 2, True)
-            elif exc_type == "sa_double_3":
-                (i, j, a, b) = np.array(exc_indices) + offset
-                T = G2_sa(i, j, a, b, 3, True)
-            else:
-                raise ValueError(f"Got unknown excitation type: {exc_type}")
-            S = (1, math.sqrt(2) / 2)
-            k1 = (-1, 2 * math.sqrt(2))
-            k3 = (-2, 2 * math.sqrt(2))
-            k2 = (1, -4)
-            k4 = (2, -4)
-            tmp = propagate_state_SA(
-                [T],
-                out,
-                ci_info,
-                do_folding=False,
-            )
-            out += (k1[0] * np.sin(S[0] * theta) + k1[1] * np.sin(S[1] * theta)) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (k2[0] * (np.cos(S[0] * theta) - 1) + k2[1] * (np.cos(S[1] * theta) - 1)) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (k3[0] * np.sin(S[0] * theta) + k3[1] * np.sin(S[1] * theta)) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (k4[0] * (np.cos(S[0] * theta) - 1) + k4[1] * (np.cos(S[1] * theta) - 1)) * tmp
-        elif exc_type in ("sa_double_4",):
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 4, True)
-            S = (1, math.sqrt(2), math.sqrt(2) / 2, 1 / 2)  # type: ignore
-            k1 = (2 / 3, -math.sqrt(2) / 42, -8 * math.sqrt(2) / 3, 128 / 21)  # type: ignore
-            k3 = (13 / 3, -math.sqrt(2) / 6, -44 * math.sqrt(2) / 3, 64 / 3)  # type: ignore
-            k5 = (22 / 3, -math.sqrt(2) / 3, -52 * math.sqrt(2) / 3, 64 / 3)  # type: ignore
-            k7 = (8 / 3, -4 * math.sqrt(2) / 21, -16 * math.sqrt(2) / 3, 128 / 21)  # type: ignore
-            k2 = (-2 / 3, 1 / 42, 16 / 3, -256 / 21)  # type: ignore
-            k4 = (-13 / 3, 1 / 6, 88 / 3, -128 / 3)  # type: ignore
-            k6 = (-22 / 3, 1 / 3, 104 / 3, -128 / 3)  # type: ignore
-            k8 = (-8 / 3, 4 / 21, 32 / 3, -256 / 21)  # type: ignore
-            tmp = propagate_state_SA(
+            tmp = propagator(
                 [T],
                 out,
                 ci_info,
                 do_folding=False,
+                out=buf_T,
             )
             out += (
-                k1[0] * np.sin(S[0] * theta)  # type: ignore
-                + k1[1] * np.sin(S[1] * theta)  # type: ignore
-                + k1[2] * np.sin(S[2] * theta)  # type: ignore
-                + k1[3] * np.sin(S[3] * theta)  # type: ignore
-            ) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k2[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k2[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k2[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k2[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-            ) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k3[0] * np.sin(S[0] * theta)  # type: ignore
-                + k3[1] * np.sin(S[1] * theta)  # type: ignore
-                + k3[2] * np.sin(S[2] * theta)  # type: ignore
-                + k3[3] * np.sin(S[3] * theta)  # type: ignore
-            ) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k4[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k4[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k4[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k4[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
+                k1[0] * sin_S[0]  # type: ignore
+                + k1[1] * sin_S[1]  # type: ignore
+                + k1[2] * sin_S[2]  # type: ignore
+                + k1[3] * sin_S[3]  # type: ignore
+                + k1[4] * sin_S[4]  # type: ignore
             ) * tmp
-            tmp = propagate_state_SA(
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_TT,
             )
             out += (
-                k5[0] * np.sin(S[0] * theta)  # type: ignore
-                + k5[1] * np.sin(S[1] * theta)  # type: ignore
-                + k5[2] * np.sin(S[2] * theta)  # type: ignore
-                + k5[3] * np.sin(S[3] * theta)  # type: ignore
+                k2[0] * cos_S_minus_one[0]  # type: ignore
+                + k2[1] * cos_S_minus_one[1]  # type: ignore
+                + k2[2] * cos_S_minus_one[2]  # type: ignore
+                + k2[3] * cos_S_minus_one[3]  # type: ignore
+                + k2[4] * cos_S_minus_one[4]  # type: ignore
             ) * tmp
-            tmp = propagate_state_SA(
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_T,
             )
             out += (
-                k6[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k6[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k6[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k6[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
+                k3[0] * sin_S[0]  # type: ignore
+                + k3[1] * sin_S[1]  # type: ignore
+                + k3[2] * sin_S[2]  # type: ignore
+                + k3[3] * sin_S[3]  # type: ignore
+                + k3[4] * sin_S[4]  # type: ignore
             ) * tmp
-            tmp = propagate_state_SA(
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_TT,
             )
             out += (
-                k7[0] * np.sin(S[0] * theta)  # type: ignore
-                + k7[1] * np.sin(S[1] * theta)  # type: ignore
-                + k7[2] * np.sin(S[2] * theta)  # type: ignore
-                + k7[3] * np.sin(S[3] * theta)  # type: ignore
-            ) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k8[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k8[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k8[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k8[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-            ) * tmp
-        elif exc_type in ("sa_double_5",):
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 5, True)
-            S = (math.sqrt(2), math.sqrt(2) / 2, math.sqrt(3) / 3, math.sqrt(3) / 2, math.sqrt(3) / 6)  # type: ignore
-            k1 = (  # type: ignore
-                math.sqrt(2) / 1150,
-                8 * math.sqrt(2) / 5,
-                -54 * math.sqrt(3) / 25,
-                -16 * math.sqrt(3) / 75,
-                432 * math.sqrt(3) / 115,
-            )
-            k3 = (  # type: ignore
-                11 * math.sqrt(2) / 690,
-                404 * math.sqrt(2) / 15,
-                -171 * math.sqrt(3) / 5,
-                -56 * math.sqrt(3) / 15,
-                2952 * math.sqrt(3) / 115,
-            )
-            k5 = (  # type: ignore
-                133 * math.sqrt(2) / 1725,
-                308 * math.sqrt(2) / 3,
-                -2718 * math.sqrt(3) / 25,
-                -1192 * math.sqrt(3) / 75,
-                1368 * math.sqrt(3) / 23,
-            )
-            k7 = (  # type: ignore
-                16 * math.sqrt(2) / 115,
-                608 * math.sqrt(2) / 5,
-                -576 * math.sqrt(3) / 5,
-                -112 * math.sqrt(3) / 5,
-                6192 * math.sqrt(3) / 115,
-            )
-            k9 = (  # type: ignore
-                48 * math.sqrt(2) / 575,
-                192 * math.sqrt(2) / 5,
-                -864 * math.sqrt(3) / 25,
-                -192 * math.sqrt(3) / 25,
-                1728 * math.sqrt(3) / 115,
-            )
-            k2 = (-1 / 1150, -16 / 5, 162 / 25, 32 / 75, -2592 / 115)  # type: ignore
-            k4 = (-11 / 690, -808 / 15, 513 / 5, 112 / 15, -17712 / 115)  # type: ignore
-            k6 = (-133 / 1725, -616 / 3, 8154 / 25, 2384 / 75, -8208 / 23)  # type: ignore
-            k8 = (-16 / 115, -1216 / 5, 1728 / 5, 224 / 5, -37152 / 115)  # type: ignore
-            k10 = (-48 / 575, -384 / 5, 2592 / 25, 384 / 25, -10368 / 115)  # type: ignore
-            tmp = propagate_state_SA(
-                [T],
-                out,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k1[0] * np.sin(S[0] * theta)  # type: ignore
-                + k1[1] * np.sin(S[1] * theta)  # type: ignore
-                + k1[2] * np.sin(S[2] * theta)  # type: ignore
-                + k1[3] * np.sin(S[3] * theta)  # type: ignore
-                + k1[4] * np.sin(S[4] * theta)  # type: ignore
+                k4[0] * cos_S_minus_one[0]  # type: ignore
+                + k4[1] * cos_S_minus_one[1]  # type: ignore
+                + k4[2] * cos_S_minus_one[2]  # type: ignore
+                + k4[3] * cos_S_minus_one[3]  # type: ignore
+                + k4[4] * cos_S_minus_one[4]  # type: ignore
             ) * tmp
-            tmp = propagate_state_SA(
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_T,
             )
             out += (
-                k2[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k2[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k2[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k2[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-                + k2[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
+                k5[0] * sin_S[0]  # type: ignore
+                + k5[1] * sin_S[1]  # type: ignore
+                + k5[2] * sin_S[2]  # type: ignore
+                + k5[3] * sin_S[3]  # type: ignore
+                + k5[4] * sin_S[4]  # type: ignore
             ) * tmp
-            tmp = propagate_state_SA(
+            tmp = propagator(
                 [T],
                 tmp,
                 ci_info,
                 do_folding=False,
+                out=buf_TT,
             )
             out += (
-                k3[0] * np.sin(S[0] * theta)  # type: ignore
-                + k3[1] * np.sin(S[1] * theta)  # type: ignore
-                + k3[2] * np.sin(S[2] * theta)  # type: ignore
-                + k3[3] * np.sin(S[3] * theta)  # type: ignore
-                + k3[4] * np.sin(S[4] * theta)  # type: ignore
+                k6[0] * cos_S_minus_one[0]  # type: ignore
+                + k6[1] * cos_S_minus_one[1]  # type: ignore
+                + k6[2] * cos_S_minus_one[2]  # type: ignore
+                + k6[3] * cos_S_minus_one[3]  # type: ignore
+                + k6[4] * cos_S_minus_one[4]  # type: ignore
             ) * tmp
-            tmp = propagate_state_SA(
+            tmp = propagator(
                 [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k4[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k4[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k4[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k4[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-                + k4[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-            ) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k5[0] * np.sin(S[0] * theta)  # type: ignore
-                + k5[1] * np.sin(S[1] * theta)  # type: ignore
-                + k5[2] * np.sin(S[2] * theta)  # type: ignore
-                + k5[3] * np.sin(S[3] * theta)  # type: ignore
-                + k5[4] * np.sin(S[4] * theta)  # type: ignore
-            ) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k6[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k6[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k6[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k6[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-                + k6[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-            ) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k7[0] * np.sin(S[0] * theta)  # type: ignore
-                + k7[1] * np.sin(S[1] * theta)  # type: ignore
-                + k7[2] * np.sin(S[2] * theta)  # type: ignore
-                + k7[3] * np.sin(S[3] * theta)  # type: ignore
-                + k7[4] * np.sin(S[4] * theta)  # type: ignore
-            ) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k8[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k8[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k8[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k8[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-                + k8[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-            ) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k9[0] * np.sin(S[0] * theta)  # type: ignore
-                + k9[1] * np.sin(S[1] * theta)  # type: ignore
-                + k9[2] * np.sin(S[2] * theta)  # type: ignore
-                + k9[3] * np.sin(S[3] * theta)  # type: ignore
-                + k9[4] * np.sin(S[4] * theta)  # type: ignore
-            ) * tmp
-            tmp = propagate_state_SA(
-                [T],
-                tmp,
-                ci_info,
-                do_folding=False,
-            )
-            out += (
-                k10[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-                + k10[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-                + k10[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-                + k10[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-                + k10[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-            ) * tmp
-        else:
-            raise ValueError(f"Got unknown excitation type, {exc_type}")
-    return out
-
-
-def propagate_unitary(
-    state: np.ndarray,
-    idx: int,
-    ci_info: CI_Info,
-    thetas: Sequence[float],
-    ups_struct: UpsStructure,
-) -> np.ndarray:
-    """Apply unitary from UPS operator number 'idx' to state.
-
-    #. 10.48550/arXiv.2505.00883, Eq. 45, 47, and, 49 (SA doubles)
-    #. 10.48550/arXiv.2505.02984, Eq. 35, D1, and, D2 (SA doubles)
-
-    Args:
-        state: State vector.
-        idx: Index of operator in the ups_struct.
-        ci_info: Information about the CI space.
-        thetas: Values for ansatz parameters.
-        ups_struct: UPS structure object.
-
-    Returns:
-        State with unitary applied.
-    """
-    # Select unitary operation based on idx
-    exc_type = ups_struct.excitation_operator_type[idx]
-    exc_indices = ups_struct.excitation_indices[idx]
-    theta = thetas[idx]
-    offset = ci_info.space_extension_offset
-    if abs(theta) < 10**-14:
-        return np.copy(state)
-    if exc_type in ("sa_single",):
-        A = 1  # 2**(-1/2)
-        (i, a) = np.array(exc_indices) + offset
-        # Create T matrix
-        Ta = G1(i * 2, a * 2, True)
-        Tb = G1(i * 2 + 1, a * 2 + 1, True)
-        # Analytical application on state vector
-        out = (
-            state
-            + np.sin(A * theta)
-            * propagate_state(
-                [Ta],
-                state,
-                ci_info,
-                do_folding=False,
-            )
-            + (1 - np.cos(A * theta))
-            * propagate_state(
-                [Ta, Ta],
-                state,
-                ci_info,
-                do_folding=False,
-            )
-        )
-        out = (
-            out
-            + np.sin(A * theta)
-            * propagate_state(
-                [Tb],
-                out,
-                ci_info,
-                do_folding=False,
-            )
-            + (1 - np.cos(A * theta))
-            * propagate_state(
-                [Tb, Tb],
-                out,
-                ci_info,
-                do_folding=False,
-            )
-        )
-    elif exc_type in ("single", "double", "sa_double_1"):
-        # Create T matrix
-        if exc_type == "single":
-            (i, a) = np.array(exc_indices) + 2 * offset
-            T = G1(i, a, True)
-        elif exc_type == "double":
-            (i, j, a, b) = np.array(exc_indices) + 2 * offset
-            T = G2(i, j, a, b, True)
-        elif exc_type == "sa_double_1":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 1, True)
-        else:
-            raise ValueError(f"Got unknown excitation type: {exc_type}")
-        # Analytical application on state vector
-        out = (
-            state
-            + np.sin(theta)
-            * propagate_state(
-                [T],
-                state,
-                ci_info,
-                do_folding=False,
-            )
-            + (1 - np.cos(theta))
-            * propagate_state(
-                [T, T],
-                state,
-                ci_info,
-                do_folding=False,
-            )
-        )
-    elif exc_type in ("sa_double_2", "sa_double_3"):
-        if exc_type == "sa_double_2":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 2, True)
-        elif exc_type == "sa_double_3":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 3, True)
-        else:
-            raise ValueError(f"Got unknown excitation type: {exc_type}")
-        S = (1, math.sqrt(2) / 2)
-        k1 = (-1, 2 * math.sqrt(2))
-        k3 = (-2, 2 * math.sqrt(2))
-        k2 = (1, -4)
-        k4 = (2, -4)
-        out = np.copy(state)
-        tmp = propagate_state(
-            [T],
-            state,
-            ci_info,
-            do_folding=False,
-        )
-        out += (k1[0] * np.sin(S[0] * theta) + k1[1] * np.sin(S[1] * theta)) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (k2[0] * (np.cos(S[0] * theta) - 1) + k2[1] * (np.cos(S[1] * theta) - 1)) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (k3[0] * np.sin(S[0] * theta) + k3[1] * np.sin(S[1] * theta)) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (k4[0] * (np.cos(S[0] * theta) - 1) + k4[1] * (np.cos(S[1] * theta) - 1)) * tmp
-    elif exc_type in ("sa_double_4",):
-        (i, j, a, b) = np.array(exc_indices) + offset
-        T = G2_sa(i, j, a, b, 4, True)
-        S = (1, math.sqrt(2), math.sqrt(2) / 2, 1 / 2)  # type: ignore
-        k1 = (2 / 3, -math.sqrt(2) / 42, -8 * math.sqrt(2) / 3, 128 / 21)  # type: ignore
-        k3 = (13 / 3, -math.sqrt(2) / 6, -44 * math.sqrt(2) / 3, 64 / 3)  # type: ignore
-        k5 = (22 / 3, -math.sqrt(2) / 3, -52 * math.sqrt(2) / 3, 64 / 3)  # type: ignore
-        k7 = (8 / 3, -4 * math.sqrt(2) / 21, -16 * math.sqrt(2) / 3, 128 / 21)  # type: ignore
-        k2 = (-2 / 3, 1 / 42, 16 / 3, -256 / 21)  # type: ignore
-        k4 = (-13 / 3, 1 / 6, 88 / 3, -128 / 3)  # type: ignore
-        k6 = (-22 / 3, 1 / 3, 104 / 3, -128 / 3)  # type: ignore
-        k8 = (-8 / 3, 4 / 21, 32 / 3, -256 / 21)  # type: ignore
-        out = np.copy(state)
-        tmp = propagate_state(
-            [T],
-            state,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k1[0] * np.sin(S[0] * theta)  # type: ignore
-            + k1[1] * np.sin(S[1] * theta)  # type: ignore
-            + k1[2] * np.sin(S[2] * theta)  # type: ignore
-            + k1[3] * np.sin(S[3] * theta)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k2[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k2[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k2[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k2[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k3[0] * np.sin(S[0] * theta)  # type: ignore
-            + k3[1] * np.sin(S[1] * theta)  # type: ignore
-            + k3[2] * np.sin(S[2] * theta)  # type: ignore
-            + k3[3] * np.sin(S[3] * theta)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k4[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k4[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k4[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k4[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k5[0] * np.sin(S[0] * theta)  # type: ignore
-            + k5[1] * np.sin(S[1] * theta)  # type: ignore
-            + k5[2] * np.sin(S[2] * theta)  # type: ignore
-            + k5[3] * np.sin(S[3] * theta)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k6[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k6[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k6[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k6[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k7[0] * np.sin(S[0] * theta)  # type: ignore
-            + k7[1] * np.sin(S[1] * theta)  # type: ignore
-            + k7[2] * np.sin(S[2] * theta)  # type: ignore
-            + k7[3] * np.sin(S[3] * theta)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k8[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k8[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k8[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k8[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-        ) * tmp
-    elif exc_type in ("sa_double_5",):
-        (i, j, a, b) = np.array(exc_indices) + offset
-        T = G2_sa(i, j, a, b, 5, True)
-        S = (math.sqrt(2), math.sqrt(2) / 2, math.sqrt(3) / 3, math.sqrt(3) / 2, math.sqrt(3) / 6)  # type: ignore
-        k1 = (  # type: ignore
-            math.sqrt(2) / 1150,
-            8 * math.sqrt(2) / 5,
-            -54 * math.sqrt(3) / 25,
-            -16 * math.sqrt(3) / 75,
-            432 * math.sqrt(3) / 115,
-        )
-        k3 = (  # type: ignore
-            11 * math.sqrt(2) / 690,
-            404 * math.sqrt(2) / 15,
-            -171 * math.sqrt(3) / 5,
-            -56 * math.sqrt(3) / 15,
-            2952 * math.sqrt(3) / 115,
-        )
-        k5 = (  # type: ignore
-            133 * math.sqrt(2) / 1725,
-            308 * math.sqrt(2) / 3,
-            -2718 * math.sqrt(3) / 25,
-            -1192 * math.sqrt(3) / 75,
-            1368 * math.sqrt(3) / 23,
-        )
-        k7 = (  # type: ignore
-            16 * math.sqrt(2) / 115,
-            608 * math.sqrt(2) / 5,
-            -576 * math.sqrt(3) / 5,
-            -112 * math.sqrt(3) / 5,
-            6192 * math.sqrt(3) / 115,
-        )
-        k9 = (  # type: ignore
-            48 * math.sqrt(2) / 575,
-            192 * math.sqrt(2) / 5,
-            -864 * math.sqrt(3) / 25,
-            -192 * math.sqrt(3) / 25,
-            1728 * math.sqrt(3) / 115,
-        )
-        k2 = (-1 / 1150, -16 / 5, 162 / 25, 32 / 75, -2592 / 115)  # type: ignore
-        k4 = (-11 / 690, -808 / 15, 513 / 5, 112 / 15, -17712 / 115)  # type: ignore
-        k6 = (-133 / 1725, -616 / 3, 8154 / 25, 2384 / 75, -8208 / 23)  # type: ignore
-        k8 = (-16 / 115, -1216 / 5, 1728 / 5, 224 / 5, -37152 / 115)  # type: ignore
-        k10 = (-48 / 575, -384 / 5, 2592 / 25, 384 / 25, -10368 / 115)  # type: ignore
-        out = np.copy(state)
-        tmp = propagate_state(
-            [T],
-            state,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k1[0] * np.sin(S[0] * theta)  # type: ignore
-            + k1[1] * np.sin(S[1] * theta)  # type: ignore
-            + k1[2] * np.sin(S[2] * theta)  # type: ignore
-            + k1[3] * np.sin(S[3] * theta)  # type: ignore
-            + k1[4] * np.sin(S[4] * theta)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k2[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k2[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k2[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k2[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-            + k2[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k3[0] * np.sin(S[0] * theta)  # type: ignore
-            + k3[1] * np.sin(S[1] * theta)  # type: ignore
-            + k3[2] * np.sin(S[2] * theta)  # type: ignore
-            + k3[3] * np.sin(S[3] * theta)  # type: ignore
-            + k3[4] * np.sin(S[4] * theta)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k4[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k4[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k4[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k4[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-            + k4[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k5[0] * np.sin(S[0] * theta)  # type: ignore
-            + k5[1] * np.sin(S[1] * theta)  # type: ignore
-            + k5[2] * np.sin(S[2] * theta)  # type: ignore
-            + k5[3] * np.sin(S[3] * theta)  # type: ignore
-            + k5[4] * np.sin(S[4] * theta)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k6[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k6[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k6[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k6[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-            + k6[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k7[0] * np.sin(S[0] * theta)  # type: ignore
-            + k7[1] * np.sin(S[1] * theta)  # type: ignore
-            + k7[2] * np.sin(S[2] * theta)  # type: ignore
-            + k7[3] * np.sin(S[3] * theta)  # type: ignore
-            + k7[4] * np.sin(S[4] * theta)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k8[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k8[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k8[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k8[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-            + k8[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k9[0] * np.sin(S[0] * theta)  # type: ignore
-            + k9[1] * np.sin(S[1] * theta)  # type: ignore
-            + k9[2] * np.sin(S[2] * theta)  # type: ignore
-            + k9[3] * np.sin(S[3] * theta)  # type: ignore
-            + k9[4] * np.sin(S[4] * theta)  # type: ignore
-        ) * tmp
-        tmp = propagate_state(
-            [T],
-            tmp,
-            ci_info,
-            do_folding=False,
-        )
-        out += (
-            k10[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k10[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k10[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k10[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-            + k10[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
-        ) * tmp
-    else:
-        raise ValueError(f"Got unknown excitation type, {exc_type}")
+                tmp,
+                ci_info,
+                do_folding=False,
+                out=buf_T,
+            )
+            out += (
+                k7[0] * sin_S[0]  # type: ignore
+                + k7[1] * sin_S[1]  # type: ignore
+                + k7[2] * sin_S[2]  # type: ignore
+                + k7[3] * sin_S[3]  # type: ignore
+                + k7[4] * sin_S[4]  # type: ignore
+            ) * tmp
+            tmp = propagator(
+                [T],
+                tmp,
+                ci_info,
+                do_folding=False,
+                out=buf_TT,
+            )
+            out += (
+                k8[0] * cos_S_minus_one[0]  # type: ignore
+                + k8[1] * cos_S_minus_one[1]  # type: ignore
+                + k8[2] * cos_S_minus_one[2]  # type: ignore
+                + k8[3] * cos_S_minus_one[3]  # type: ignore
+                + k8[4] * cos_S_minus_one[4]  # type: ignore
+            ) * tmp
+            tmp = propagator(
+                [T],
+                tmp,
+                ci_info,
+                do_folding=False,
+                out=buf_T,
+            )
+            out += (
+                k9[0] * sin_S[0]  # type: ignore
+                + k9[1] * sin_S[1]  # type: ignore
+                + k9[2] * sin_S[2]  # type: ignore
+                + k9[3] * sin_S[3]  # type: ignore
+                + k9[4] * sin_S[4]  # type: ignore
+            ) * tmp
+            tmp = propagator(
+                [T],
+                tmp,
+                ci_info,
+                do_folding=False,
+                out=buf_TT,
+            )
+            out += (
+                k10[0] * cos_S_minus_one[0]  # type: ignore
+                + k10[1] * cos_S_minus_one[1]  # type: ignore
+                + k10[2] * cos_S_minus_one[2]  # type: ignore
+                + k10[3] * cos_S_minus_one[3]  # type: ignore
+                + k10[4] * cos_S_minus_one[4]  # type: ignore
+            ) * tmp
+        else:
+            raise ValueError(f"Got unknown excitation type, {exc_type}")
     return out
 
 
-def propagate_unitary_SA(
+def construct_ups_state(
     state: np.ndarray,
-    idx: int,
     ci_info: CI_Info,
     thetas: Sequence[float],
     ups_struct: UpsStructure,
+    dagger: bool = False,
 ) -> np.ndarray:
-    """Apply unitary from UPS operator number 'idx' to state.
+    r"""Construct unitary product state by applying UPS unitary to reference state.
+
+    .. math::
+        \boldsymbol{U}_N...\boldsymbol{U}_0\left|\nu\right> = \left|\tilde\nu\right>
+
+    #. 10.48550/arXiv.2303.10825, Eq. 15
+    #. 10.48550/arXiv.2505.00883, Eq. 45, 47, and, 49 (SA doubles)
+    #. 10.48550/arXiv.2505.02984, Eq. 35, D1, and, D2 (SA doubles)
+
+    Args:
+        state: Reference state vector.
+        ci_info: Information about the CI space.
+        thetas: Ansatz parameters values.
+        ups_struct: Unitary product state structure.
+        dagger: If true, do dagger unitaries.
+
+    Returns:
+        New state vector with unitaries applied.
+    """
+    return _construct_ups_state(state, ci_info, thetas, ups_struct, dagger, propagate_state)
+
+
+def construct_ups_state_SA(
+    state: np.ndarray,
+    ci_info: CI_Info,
+    thetas: Sequence[float],
+    ups_struct: UpsStructure,
+    dagger: bool = False,
+) -> np.ndarray:
+    r"""Construct unitary product state by applying UPS unitary to reference state.
+
+    .. math::
+        \boldsymbol{U}_N...\boldsymbol{U}_0\left|\nu\right> = \left|\tilde\nu\right>
 
+    #. 10.48550/arXiv.2303.10825, Eq. 15
     #. 10.48550/arXiv.2505.00883, Eq. 45, 47, and, 49 (SA doubles)
     #. 10.48550/arXiv.2505.02984, Eq. 35, D1, and, D2 (SA doubles)
 
+    Args:
+        state: Reference state vector.
+        ci_info: Information about the CI space.
+        thetas: Ansatz parameters values.
+        ups_struct: Unitary product state structure.
+        dagger: If true, do dagger unitaries.
+
+    Returns:
+        New state vector with unitaries applied.
+    """
+    return _construct_ups_state(state, ci_info, thetas, ups_struct, dagger, propagate_state_SA)
+
+
+def _propagate_unitary(
+    state: np.ndarray,
+    idx: int,
+    ci_info: CI_Info,
+    thetas: Sequence[float],
+    ups_struct: UpsStructure,
+    propagator: Callable[..., np.ndarray],
+) -> np.ndarray:
+    """Apply unitary from UPS operator number 'idx' to state, see :func:`propagate_unitary`.
+
     Args:
         state: State vector.
         idx: Index of operator in the ups_struct.
         ci_info: Information about the CI space.
         thetas: Values for ansatz parameters.
         ups_struct: UPS structure object.
+        propagator: propagate_state or propagate_state_SA.
 
     Returns:
         State with unitary applied.
+        If the angle is zero, state itself is returned and not a copy.
     """
     # Select unitary operation based on idx
     exc_type = ups_struct.excitation_operator_type[idx]
-    exc_indices = ups_struct.excitation_indices[idx]
     theta = thetas[idx]
     offset = ci_info.space_extension_offset
     if abs(theta) < 10**-14:
-        return np.copy(state)
+        # The unitary is the identity.
+        return state
+    # Buffers for the action of powers of T.
+    buf_T = np.empty_like(state)
+    buf_TT = np.empty_like(state)
+    generators = get_ups_generators(ups_struct, offset)[idx]
     if exc_type in ("sa_single",):
         A = 1  # 2**(-1/2)
-        (i, a) = np.array(exc_indices) + offset
-        # Create T matrix
-        Ta = G1(i * 2, a * 2, True)
-        Tb = G1(i * 2 + 1, a * 2 + 1, True)
+        Ta, Tb, _ = generators
+        # Ta and Tb share the same angle.
+        sin_theta = math.sin(A * theta)
+        one_minus_cos_theta = 1 - math.cos(A * theta)
         # Analytical application on state vector
-        out = (
-            state
-            + np.sin(A * theta)
-            * propagate_state_SA(
-                [Ta],
-                state,
-                ci_info,
-                do_folding=False,
-            )
-            + (1 - np.cos(A * theta))
-            * propagate_state_SA(
-                [Ta, Ta],
-                state,
-                ci_info,
-                do_folding=False,
-            )
-        )
-        out = (
-            out
-            + np.sin(A * theta)
-            * propagate_state_SA(
-                [Tb],
-                out,
-                ci_info,
-                do_folding=False,
-            )
-            + (1 - np.cos(A * theta))
-            * propagate_state_SA(
-                [Tb, Tb],
-                out,
-                ci_info,
-                do_folding=False,
-            )
+        out = rotate_state(
+            state,
+            Ta,
+            sin_theta,
+            one_minus_cos_theta,
+            ci_info,
+            propagator,
+            buf_T,
+            buf_TT,
+            np.empty(state.shape),
+        )
+        out = rotate_state(
+            out,
+            Tb,
+            sin_theta,
+            one_minus_cos_theta,
+            ci_info,
+            propagator,
+            buf_T,
+            buf_TT,
+            out,
         )
     elif exc_type in ("single", "double", "sa_double_1"):
-        # Create T matrix
-        if exc_type == "single":
-            (i, a) = np.array(exc_indices) + 2 * offset
-            T = G1(i, a, True)
-        elif exc_type == "double":
-            (i, j, a, b) = np.array(exc_indices) + 2 * offset
-            T = G2(i, j, a, b, True)
-        elif exc_type == "sa_double_1":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 1, True)
-        else:
-            raise ValueError(f"Got unknown excitation type: {exc_type}")
+        T = generators[0]
         # Analytical application on state vector
-        out = (
-            state
-            + np.sin(theta)
-            * propagate_state_SA(
-                [T],
-                state,
-                ci_info,
-                do_folding=False,
-            )
-            + (1 - np.cos(theta))
-            * propagate_state_SA(
-                [T, T],
-                state,
-                ci_info,
-                do_folding=False,
-            )
+        out = rotate_state(
+            state,
+            T,
+            math.sin(theta),
+            1 - math.cos(theta),
+            ci_info,
+            propagator,
+            buf_T,
+            buf_TT,
+            np.empty(state.shape),
         )
     elif exc_type in ("sa_double_2", "sa_double_3"):
-        if exc_type == "sa_double_2":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 2, True)
-        elif exc_type == "sa_double_3":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 3, True)
-        else:
-            raise ValueError(f"Got unknown excitation type: {exc_type}")
+        T = generators[0]
         S = (1, math.sqrt(2) / 2)
+        sin_S = [math.sin(s * theta) for s in S]
+        cos_S_minus_one = [math.cos(s * theta) - 1 for s in S]
         k1 = (-1, 2 * math.sqrt(2))
         k3 = (-2, 2 * math.sqrt(2))
         k2 = (1, -4)
         k4 = (2, -4)
         out = np.copy(state)
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             state,
             ci_info,
             do_folding=False,
+            out=buf_T,
         )
-        out += (k1[0] * np.sin(S[0] * theta) + k1[1] * np.sin(S[1] * theta)) * tmp
-        tmp = propagate_state_SA(
+        out += (k1[0] * sin_S[0] + k1[1] * sin_S[1]) * tmp
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_TT,
         )
-        out += (k2[0] * (np.cos(S[0] * theta) - 1) + k2[1] * (np.cos(S[1] * theta) - 1)) * tmp
-        tmp = propagate_state_SA(
+        out += (k2[0] * cos_S_minus_one[0] + k2[1] * cos_S_minus_one[1]) * tmp
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_T,
         )
-        out += (k3[0] * np.sin(S[0] * theta) + k3[1] * np.sin(S[1] * theta)) * tmp
-        tmp = propagate_state_SA(
+        out += (k3[0] * sin_S[0] + k3[1] * sin_S[1]) * tmp
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_TT,
         )
-        out += (k4[0] * (np.cos(S[0] * theta) - 1) + k4[1] * (np.cos(S[1] * theta) - 1)) * tmp
+        out += (k4[0] * cos_S_minus_one[0] + k4[1] * cos_S_minus_one[1]) * tmp
     elif exc_type in ("sa_double_4",):
-        (i, j, a, b) = np.array(exc_indices) + offset
-        T = G2_sa(i, j, a, b, 4, True)
+        T = generators[0]
         S = (1, math.sqrt(2), math.sqrt(2) / 2, 1 / 2)  # type: ignore
+        sin_S = [math.sin(s * theta) for s in S]
+        cos_S_minus_one = [math.cos(s * theta) - 1 for s in S]
         k1 = (2 / 3, -math.sqrt(2) / 42, -8 * math.sqrt(2) / 3, 128 / 21)  # type: ignore
         k3 = (13 / 3, -math.sqrt(2) / 6, -44 * math.sqrt(2) / 3, 64 / 3)  # type: ignore
         k5 = (22 / 3, -math.sqrt(2) / 3, -52 * math.sqrt(2) / 3, 64 / 3)  # type: ignore
@@ -2183,106 +1672,115 @@ def propagate_unitary_SA(
         k6 = (-22 / 3, 1 / 3, 104 / 3, -128 / 3)  # type: ignore
         k8 = (-8 / 3, 4 / 21, 32 / 3, -256 / 21)  # type: ignore
         out = np.copy(state)
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             state,
             ci_info,
             do_folding=False,
+            out=buf_T,
         )
         out += (
-            k1[0] * np.sin(S[0] * theta)  # type: ignore
-            + k1[1] * np.sin(S[1] * theta)  # type: ignore
-            + k1[2] * np.sin(S[2] * theta)  # type: ignore
-            + k1[3] * np.sin(S[3] * theta)  # type: ignore
+            k1[0] * sin_S[0]  # type: ignore
+            + k1[1] * sin_S[1]  # type: ignore
+            + k1[2] * sin_S[2]  # type: ignore
+            + k1[3] * sin_S[3]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_TT,
         )
         out += (
-            k2[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k2[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k2[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k2[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
+            k2[0] * cos_S_minus_one[0]  # type: ignore
+            + k2[1] * cos_S_minus_one[1]  # type: ignore
+            + k2[2] * cos_S_minus_one[2]  # type: ignore
+            + k2[3] * cos_S_minus_one[3]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_T,
         )
         out += (
-            k3[0] * np.sin(S[0] * theta)  # type: ignore
-            + k3[1] * np.sin(S[1] * theta)  # type: ignore
-            + k3[2] * np.sin(S[2] * theta)  # type: ignore
-            + k3[3] * np.sin(S[3] * theta)  # type: ignore
+            k3[0] * sin_S[0]  # type: ignore
+            + k3[1] * sin_S[1]  # type: ignore
+            + k3[2] * sin_S[2]  # type: ignore
+            + k3[3] * sin_S[3]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_TT,
         )
         out += (
-            k4[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k4[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k4[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k4[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
+            k4[0] * cos_S_minus_one[0]  # type: ignore
+            + k4[1] * cos_S_minus_one[1]  # type: ignore
+            + k4[2] * cos_S_minus_one[2]  # type: ignore
+            + k4[3] * cos_S_minus_one[3]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_T,
         )
         out += (
-            k5[0] * np.sin(S[0] * theta)  # type: ignore
-            + k5[1] * np.sin(S[1] * theta)  # type: ignore
-            + k5[2] * np.sin(S[2] * theta)  # type: ignore
-            + k5[3] * np.sin(S[3] * theta)  # type: ignore
+            k5[0] * sin_S[0]  # type: ignore
+            + k5[1] * sin_S[1]  # type: ignore
+            + k5[2] * sin_S[2]  # type: ignore
+            + k5[3] * sin_S[3]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_TT,
         )
         out += (
-            k6[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k6[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k6[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k6[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
+            k6[0] * cos_S_minus_one[0]  # type: ignore
+            + k6[1] * cos_S_minus_one[1]  # type: ignore
+            + k6[2] * cos_S_minus_one[2]  # type: ignore
+            + k6[3] * cos_S_minus_one[3]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_T,
         )
         out += (
-            k7[0] * np.sin(S[0] * theta)  # type: ignore
-            + k7[1] * np.sin(S[1] * theta)  # type: ignore
-            + k7[2] * np.sin(S[2] * theta)  # type: ignore
-            + k7[3] * np.sin(S[3] * theta)  # type: ignore
+            k7[0] * sin_S[0]  # type: ignore
+            + k7[1] * sin_S[1]  # type: ignore
+            + k7[2] * sin_S[2]  # type: ignore
+            + k7[3] * sin_S[3]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_TT,
         )
         out += (
-            k8[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k8[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k8[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k8[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
+            k8[0] * cos_S_minus_one[0]  # type: ignore
+            + k8[1] * cos_S_minus_one[1]  # type: ignore
+            + k8[2] * cos_S_minus_one[2]  # type: ignore
+            + k8[3] * cos_S_minus_one[3]  # type: ignore
         ) * tmp
     elif exc_type in ("sa_double_5",):
-        (i, j, a, b) = np.array(exc_indices) + offset
-        T = G2_sa(i, j, a, b, 5, True)
+        T = generators[0]
         S = (math.sqrt(2), math.sqrt(2) / 2, math.sqrt(3) / 3, math.sqrt(3) / 2, math.sqrt(3) / 6)  # type: ignore
+        sin_S = [math.sin(s * theta) for s in S]
+        cos_S_minus_one = [math.cos(s * theta) - 1 for s in S]
         k1 = (  # type: ignore
             math.sqrt(2) / 1150,
             8 * math.sqrt(2) / 5,
@@ -2324,192 +1822,238 @@ def propagate_unitary_SA(
         k8 = (-16 / 115, -1216 / 5, 1728 / 5, 224 / 5, -37152 / 115)  # type: ignore
         k10 = (-48 / 575, -384 / 5, 2592 / 25, 384 / 25, -10368 / 115)  # type: ignore
         out = np.copy(state)
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             state,
             ci_info,
             do_folding=False,
+            out=buf_T,
         )
         out += (
-            k1[0] * np.sin(S[0] * theta)  # type: ignore
-            + k1[1] * np.sin(S[1] * theta)  # type: ignore
-            + k1[2] * np.sin(S[2] * theta)  # type: ignore
-            + k1[3] * np.sin(S[3] * theta)  # type: ignore
-            + k1[4] * np.sin(S[4] * theta)  # type: ignore
+            k1[0] * sin_S[0]  # type: ignore
+            + k1[1] * sin_S[1]  # type: ignore
+            + k1[2] * sin_S[2]  # type: ignore
+            + k1[3] * sin_S[3]  # type: ignore
+            + k1[4] * sin_S[4]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_TT,
         )
         out += (
-            k2[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k2[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k2[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k2[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-            + k2[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
+            k2[0] * cos_S_minus_one[0]  # type: ignore
+            + k2[1] * cos_S_minus_one[1]  # type: ignore
+            + k2[2] * cos_S_minus_one[2]  # type: ignore
+            + k2[3] * cos_S_minus_one[3]  # type: ignore
+            + k2[4] * cos_S_minus_one[4]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_T,
         )
         out += (
-            k3[0] * np.sin(S[0] * theta)  # type: ignore
-            + k3[1] * np.sin(S[1] * theta)  # type: ignore
-            + k3[2] * np.sin(S[2] * theta)  # type: ignore
-            + k3[3] * np.sin(S[3] * theta)  # type: ignore
-            + k3[4] * np.sin(S[4] * theta)  # type: ignore
+            k3[0] * sin_S[0]  # type: ignore
+            + k3[1] * sin_S[1]  # type: ignore
+            + k3[2] * sin_S[2]  # type: ignore
+            + k3[3] * sin_S[3]  # type: ignore
+            + k3[4] * sin_S[4]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_TT,
         )
         out += (
-            k4[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k4[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k4[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k4[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-            + k4[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
+            k4[0] * cos_S_minus_one[0]  # type: ignore
+            + k4[1] * cos_S_minus_one[1]  # type: ignore
+            + k4[2] * cos_S_minus_one[2]  # type: ignore
+            + k4[3] * cos_S_minus_one[3]  # type: ignore
+            + k4[4] * cos_S_minus_one[4]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_T,
         )
         out += (
-            k5[0] * np.sin(S[0] * theta)  # type: ignore
-            + k5[1] * np.sin(S[1] * theta)  # type: ignore
-            + k5[2] * np.sin(S[2] * theta)  # type: ignore
-            + k5[3] * np.sin(S[3] * theta)  # type: ignore
-            + k5[4] * np.sin(S[4] * theta)  # type: ignore
+            k5[0] * sin_S[0]  # type: ignore
+            + k5[1] * sin_S[1]  # type: ignore
+            + k5[2] * sin_S[2]  # type: ignore
+            + k5[3] * sin_S[3]  # type: ignore
+            + k5[4] * sin_S[4]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_TT,
         )
         out += (
-            k6[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k6[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k6[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k6[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-            + k6[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
+            k6[0] * cos_S_minus_one[0]  # type: ignore
+            + k6[1] * cos_S_minus_one[1]  # type: ignore
+            + k6[2] * cos_S_minus_one[2]  # type: ignore
+            + k6[3] * cos_S_minus_one[3]  # type: ignore
+            + k6[4] * cos_S_minus_one[4]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_T,
         )
         out += (
-            k7[0] * np.sin(S[0] * theta)  # type: ignore
-            + k7[1] * np.sin(S[1] * theta)  # type: ignore
-            + k7[2] * np.sin(S[2] * theta)  # type: ignore
-            + k7[3] * np.sin(S[3] * theta)  # type: ignore
-            + k7[4] * np.sin(S[4] * theta)  # type: ignore
+            k7[0] * sin_S[0]  # type: ignore
+            + k7[1] * sin_S[1]  # type: ignore
+            + k7[2] * sin_S[2]  # type: ignore
+            + k7[3] * sin_S[3]  # type: ignore
+            + k7[4] * sin_S[4]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_TT,
         )
         out += (
-            k8[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k8[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k8[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k8[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-            + k8[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
+            k8[0] * cos_S_minus_one[0]  # type: ignore
+            + k8[1] * cos_S_minus_one[1]  # type: ignore
+            + k8[2] * cos_S_minus_one[2]  # type: ignore
+            + k8[3] * cos_S_minus_one[3]  # type: ignore
+            + k8[4] * cos_S_minus_one[4]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_T,
         )
         out += (
-            k9[0] * np.sin(S[0] * theta)  # type: ignore
-            + k9[1] * np.sin(S[1] * theta)  # type: ignore
-            + k9[2] * np.sin(S[2] * theta)  # type: ignore
-            + k9[3] * np.sin(S[3] * theta)  # type: ignore
-            + k9[4] * np.sin(S[4] * theta)  # type: ignore
+            k9[0] * sin_S[0]  # type: ignore
+            + k9[1] * sin_S[1]  # type: ignore
+            + k9[2] * sin_S[2]  # type: ignore
+            + k9[3] * sin_S[3]  # type: ignore
+            + k9[4] * sin_S[4]  # type: ignore
         ) * tmp
-        tmp = propagate_state_SA(
+        tmp = propagator(
             [T],
             tmp,
             ci_info,
             do_folding=False,
+            out=buf_TT,
         )
         out += (
-            k10[0] * (np.cos(S[0] * theta) - 1)  # type: ignore
-            + k10[1] * (np.cos(S[1] * theta) - 1)  # type: ignore
-            + k10[2] * (np.cos(S[2] * theta) - 1)  # type: ignore
-            + k10[3] * (np.cos(S[3] * theta) - 1)  # type: ignore
-            + k10[4] * (np.cos(S[4] * theta) - 1)  # type: ignore
+            k10[0] * cos_S_minus_one[0]  # type: ignore
+            + k10[1] * cos_S_minus_one[1]  # type: ignore
+            + k10[2] * cos_S_minus_one[2]  # type: ignore
+            + k10[3] * cos_S_minus_one[3]  # type: ignore
+            + k10[4] * cos_S_minus_one[4]  # type: ignore
         ) * tmp
     else:
         raise ValueError(f"Got unknown excitation type, {exc_type}")
     return out
 
 
-def get_grad_action(
+def propagate_unitary(
     state: np.ndarray,
     idx: int,
     ci_info: CI_Info,
+    thetas: Sequence[float],
     ups_struct: UpsStructure,
 ) -> np.ndarray:
-    r"""Get effect of differentiation with respect to "idx" operator in the UPS expansion.
+    """Apply unitary from UPS operator number 'idx' to state.
 
-    .. math::
-        \frac{\partial}{\partial \theta_i}\left(\left<\text{CSF}\right|\boldsymbol{U}(\theta_{i-1})\boldsymbol{U}(\theta_i)\right) =
-        \left<\text{CSF}\right|\boldsymbol{U}(\theta_{i-1})\frac{\partial \boldsymbol{U}(\theta_i)}{\partial \theta_i}
+    #. 10.48550/arXiv.2505.00883, Eq. 45, 47, and, 49 (SA doubles)
+    #. 10.48550/arXiv.2505.02984, Eq. 35, D1, and, D2 (SA doubles)
 
-    With,
+    Args:
+        state: State vector.
+        idx: Index of operator in the ups_struct.
+        ci_info: Information about the CI space.
+        thetas: Values for ansatz parameters.
+        ups_struct: UPS structure object.
 
-    .. math::
-        \begin{align}
-        \frac{\partial \boldsymbol{U}(\theta_i)}{\partial \theta_i} &= \frac{\partial}{\partial \theta_i}\exp\left(\theta_i \hat{T}_i\right)\\
-                &= \exp\left(\theta_i \hat{T}_i\right)\hat{T}_i
-        \end{align}
+    Returns:
+        State with unitary applied.
+        If the angle is zero, state itself is returned and not a copy.
+    """
+    return _propagate_unitary(state, idx, ci_info, thetas, ups_struct, propagate_state)
 
-    This function only applies the $\hat{T}_i$ part to the state.
 
-    #. 10.48550/arXiv.2303.10825, Eq. 20 (appendix - v1)
+def propagate_unitary_SA(
+    state: np.ndarray,
+    idx: int,
+    ci_info: CI_Info,
+    thetas: Sequence[float],
+    ups_struct: UpsStructure,
+) -> np.ndarray:
+    """Apply unitary from UPS operator number 'idx' to state.
+
+    #. 10.48550/arXiv.2505.00883, Eq. 45, 47, and, 49 (SA doubles)
+    #. 10.48550/arXiv.2505.02984, Eq. 35, D1, and, D2 (SA doubles)
+
+    Args:
+        state: State vector.
+        idx: Index of operator in the ups_struct.
+        ci_info: Information about the CI space.
+        thetas: Values for ansatz parameters.
+        ups_struct: UPS structure object.
+
+    Returns:
+        State with unitary applied.
+        If the angle is zero, state itself is returned and not a copy.
+    """
+    return _propagate_unitary(state, idx, ci_info, thetas, ups_struct, propagate_state_SA)
+
+
+def _get_grad_action(
+    state: np.ndarray,
+    idx: int,
+    ci_info: CI_Info,
+    ups_struct: UpsStructure,
+    propagator: Callable[..., np.ndarray],
+) -> np.ndarray:
+    """Get effect of differentiation with respect to "idx" operator, see :func:`get_grad_action`.
 
     Args:
         state: State vector.
         idx: Index of operator in the ups_struct.
         ci_info: Information about the CI space.
         ups_struct: UPS structure object.
+        propagator: propagate_state or propagate_state_SA.
 
     Returns:
         State with derivative of the idx'th unitary applied.
     """
     # Select unitary operation based on idx
-    print("Calculation for derivative")
     exc_type = ups_struct.excitation_operator_type[idx]
-    exc_indices = ups_struct.excitation_indices[idx]
     offset = ci_info.space_extension_offset
+    generators = get_ups_generators(ups_struct, offset)[idx]
     if exc_type in ("sa_single",):
-        # Create T matrix
         A = 1  # 2**(-1/2)
-        (i, a) = np.array(exc_indices) + offset
-        Ta = G1(i * 2, a * 2, True)
-        Tb = G1(i * 2 + 1, a * 2 + 1, True)
-        # Apply missing T factor of derivative
-        tmp = propagate_state(
-            [A * (Ta + Tb)],
+        T = generators[2]
+        # Apply missing T factor of derivative.
+        # The factor is applied to the state, such that the cached Ta + Tb and its bitmasks are reused.
+        tmp = propagator(
+            [T],
             state,
             ci_info,
             do_folding=False,
         )
+        tmp *= A
     elif exc_type in (
         "single",
         "double",
@@ -2519,32 +2063,9 @@ def get_grad_action(
         "sa_double_4",
         "sa_double_5",
     ):
-        # Create T matrix
-        if exc_type == "single":
-            (i, a) = np.array(exc_indices) + 2 * offset
-            T = G1(i, a, True)
-        elif exc_type == "double":
-            (i, j, a, b) = np.array(exc_indices) + 2 * offset
-            T = G2(i, j, a, b, True)
-        elif exc_type == "sa_double_1":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 1, True)
-        elif exc_type == "sa_double_2":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 2, True)
-        elif exc_type == "sa_double_3":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 3, True)
-        elif exc_type == "sa_double_4":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 4, True)
-        elif exc_type == "sa_double_5":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 5, True)
-        else:
-            raise ValueError(f"Got unknown excitation type: {exc_type}")
+        T = generators[0]
         # Apply missing T factor of derivative
-        tmp = propagate_state(
+        tmp = propagator(
             [T],
             state,
             ci_info,
@@ -2555,6 +2076,43 @@ def get_grad_action(
     return tmp
 
 
+def get_grad_action(
+    state: np.ndarray,
+    idx: int,
+    ci_info: CI_Info,
+    ups_struct: UpsStructure,
+) -> np.ndarray:
+    r"""Get effect of differentiation with respect to "idx" operator in the UPS expansion.
+
+    .. math::
+        \frac{\partial}{\partial \theta_i}\left(\left<\text{CSF}\right|\boldsymbol{U}(\theta_{i-1})\boldsymbol{U}(\theta_i)\right) =
+        \left<\text{CSF}\right|\boldsymbol{U}(\theta_{i-1})\frac{\partial \boldsymbol{U}(\theta_i)}{\partial \theta_i}
+
+    With,
+
+    .. math::
+        \begin{align}
+        \frac{\partial \boldsymbol{U}(\theta_i)}{\partial \theta_i} &= \frac{\partial}{\partial \theta_i}\exp\left(\theta_i \hat{T}_i\right)\\
+                &= \exp\left(\theta_i \hat{T}_i\right)\hat{T}_i
+        \end{align}
+
+    This function only applies the $\hat{T}_i$ part to the state.
+
+    #. 10.48550/arXiv.2303.10825, Eq. 20 (appendix - v1)
+
+    Args:
+        state: State vector.
+        idx: Index of operator in the ups_struct.
+        ci_info: Information about the CI space.
+        ups_struct: UPS structure object.
+
+    Returns:
+        State with derivative of the idx'th unitary applied.
+    """
+    print("Calculation for derivative")
+    return _get_grad_action(state, idx, ci_info, ups_struct, propagate_state)
+
+
 def get_grad_action_SA(
     state: np.ndarray,
     idx: int,
@@ -2588,66 +2146,7 @@ def get_grad_action_SA(
     Returns:
         State with derivative of the idx'th unitary applied.
     """
-    # Select unitary operation based on idx
-    exc_type = ups_struct.excitation_operator_type[idx]
-    exc_indices = ups_struct.excitation_indices[idx]
-    offset = ci_info.space_extension_offset
-    if exc_type in ("sa_single",):
-        # Create T matrix
-        A = 1  # 2**(-1/2)
-        (i, a) = np.array(exc_indices) + offset
-        Ta = G1(i * 2, a * 2, True)
-        Tb = G1(i * 2 + 1, a * 2 + 1, True)
-        # Apply missing T factor of derivative
-        tmp = propagate_state_SA(
-            [A * (Ta + Tb)],
-            state,
-            ci_info,
-            do_folding=False,
-        )
-    elif exc_type in (
-        "single",
-        "double",
-        "sa_double_1",
-        "sa_double_2",
-        "sa_double_3",
-        "sa_double_4",
-        "sa_double_5",
-    ):
-        # Create T matrix
-        if exc_type == "single":
-            (i, a) = np.array(exc_indices) + 2 * offset
-            T = G1(i, a, True)
-        elif exc_type == "double":
-            (i, j, a, b) = np.array(exc_indices) + 2 * offset
-            T = G2(i, j, a, b, True)
-        elif exc_type == "sa_double_1":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 1, True)
-        elif exc_type == "sa_double_2":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 2, True)
-        elif exc_type == "sa_double_3":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 3, True)
-        elif exc_type == "sa_double_4":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 4, True)
-        elif exc_type == "sa_double_5":
-            (i, j, a, b) = np.array(exc_indices) + offset
-            T = G2_sa(i, j, a, b, 5, True)
-        else:
-            raise ValueError(f"Got unknown excitation type: {exc_type}")
-        # Apply missing T factor of derivative
-        tmp = propagate_state_SA(
-            [T],
-            state,
-            ci_info,
-            do_folding=False,
-        )
-    else:
-        raise ValueError(f"Got unknown excitation type, {exc_type}")
-    return tmp
+    return _get_grad_action(state, idx, ci_info, ups_struct, propagate_state_SA)
 
 
 def get_determinant_expansion_from_operator_on_HF(
@@ -2685,21 +2184,18 @@ def get_determinant_expansion_from_operator_on_HF(
     for i in range(2 * num_active_orbs - 1, -1, -1):
         num += 2**i
         parity_check[2 * num_active_orbs - i] = num
+    # Bit of each spin orbital in the determinant.
+    orb_bits = [1 << (2 * num_active_orbs - 1 - orb_idx) for orb_idx in range(2 * num_active_orbs)]
     for anni_string in operator.operators:
         det = hf_det
         phase_changes = 0
         for orb_idx, dagger in anni_string[::-1]:
-            nth_bit = (det >> 2 * num_active_orbs - 1 - orb_idx) & 1
-            if nth_bit == 0 and dagger:
-                det = det ^ 2 ** (2 * num_active_orbs - 1 - orb_idx)
-                phase_changes += (det & parity_check[orb_idx]).bit_count()
-            elif nth_bit == 1 and dagger:
-                break
-            elif nth_bit == 0 and not dagger:
+            bit = orb_bits[orb_idx]
+            if bool(det & bit) == dagger:
+                # Creation of an occupied or annihilation of an unoccupied spin orbital.
                 break
-            elif nth_bit == 1 and not dagger:
-                det = det ^ 2 ** (2 * num_active_orbs - 1 - orb_idx)
-                phase_changes += (det & parity_check[orb_idx]).bit_count()
+            det = det ^ bit
+            phase_changes += (det & parity_check[orb_idx]).bit_count()
         else:  # nobreak
             val = operator.operators[anni_string] * (-1) ** phase_changes
             coeffs.append(val)
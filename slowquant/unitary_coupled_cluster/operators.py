@@ -490,14 +490,15 @@ def hamiltonian_0i_0a(
     Returns:
         Energy Hamiltonian fermionic operator.
     """
+    active_orbs = range(num_inactive_orbs, num_inactive_orbs + num_active_orbs)
     hamiltonian_operator = FermionicOperator({})
     # Inactive one-electron
     for i in range(num_inactive_orbs):
         if abs(h_mo[i, i]) > 10**-14:
             hamiltonian_operator += h_mo[i, i] * Epq(i, i)
     # Active one-electron
-    for p in range(num_inactive_orbs, num_inactive_orbs + num_active_orbs):
-        for q in range(num_inactive_orbs, num_inactive_orbs + num_active_orbs):
+    for p in active_orbs:
+        for q in active_orbs:
             if abs(h_mo[p, q]) > 10**-14:
                 hamiltonian_operator += h_mo[p, q] * Epq(p, q)
     # Inactive two-electron
@@ -509,8 +510,8 @@ def hamiltonian_0i_0a(
                 hamiltonian_operator += 1 / 2 * g_mo[j, i, i, j] * epqrs(j, i, i, j)
     # Inactive-Active two-electron
     for i in range(num_inactive_orbs):
-        for p in range(num_inactive_orbs, num_inactive_orbs + num_active_orbs):
-            for q in range(num_inactive_orbs, num_inactive_orbs + num_active_orbs):
+        for p in active_orbs:
+            for q in active_orbs:
                 if abs(g_mo[i, i, p, q]) > 10**-14:
                     hamiltonian_operator += 1 / 2 * g_mo[i, i, p, q] * epqrs(i, i, p, q)
                 if abs(g_mo[p, q, i, i]) > 10**-14:
@@ -520,13 +521,13 @@ def hamiltonian_0i_0a(
                 if abs(g_mo[i, p, q, i]) > 10**-14:
                     hamiltonian_operator += 1 / 2 * g_mo[i, p, q, i] * epqrs(i, p, q, i)
     # Active two-electron
-    for p in range(num_inactive_orbs, num_inactive_orbs + num_active_orbs):
-        for q in range(num_inactive_orbs, num_inactive_orbs + num_active_orbs):
-            for r in range(num_inactive_orbs, num_inactive_orbs + num_active_orbs):
-                for s in range(num_inactive_orbs, num_inactive_orbs + num_active_orbs):
+    for p in active_orbs:
+        for q in active_orbs:
+            for r in active_orbs:
+                for s in active_orbs:
                     if abs(g_mo[p, q, r, s]) > 10**-14:
                         hamiltonian_operator += 1 / 2 * g_mo[p, q, r, s] * epqrs(p, q, r, s)
-                        
+
     return hamiltonian_operator
 
 
@@ -696,14 +697,15 @@ def one_elec_op_0i_0a(ints_mo: np.ndarray, num_inactive_orbs: int, num_active_or
     Returns:
         One-electron operator for active-space.
     """
+    active_orbs = range(num_inactive_orbs, num_inactive_orbs + num_active_orbs)
     one_elec_op = FermionicOperator({})
     # Inactive one-electron
     for i in range(num_inactive_orbs):
         if abs(ints_mo[i, i]) > 10**-14:
             one_elec_op += ints_mo[i, i] * Epq(i, i)
     # Active one-electron
-    for p in range(num_inactive_orbs, num_inactive_orbs + num_active_orbs):
-        for q in range(num_inactive_orbs, num_inactive_orbs + num_active_orbs):
+    for p in active_orbs:
+        for q in active_orbs:
             if abs(ints_mo[p, q]) > 10**-14:
                 one_elec_op += ints_mo[p, q] * Epq(p, q)
     return one_elec_op
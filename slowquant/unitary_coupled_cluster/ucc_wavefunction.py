@@ -23,6 +23,7 @@ from slowquant.unitary_coupled_cluster.operator_state_algebra import (
     build_operator_matrix,
     construct_ucc_state,
     expectation_value,
+    get_ucc_generators,
     get_ucc_T,
     propagate_state,
 )
@@ -1105,17 +1106,18 @@ class WaveFunctionUCC:
                 get_ucc_T(self.thetas, self.ucc_layout),
                 self.ci_info,
             )
+            # The step only changes one parameter, so only its generator has to be built,
+            # instead of T for a parameter vector that is zero everywhere else.
+            generators = get_ucc_generators(self.ucc_layout)
             for i in range(len(theta_params)):
                 sign_step = (theta_params[i] >= 0).astype(float) * 2 - 1  # type: ignore [attr-defined]
                 step_size = eps * sign_step * max(1, abs(theta_params[i]))
-                theta_params[i] += step_size
-                Tmat_plus = build_operator_matrix(
-                    get_ucc_T(theta_params, self.ucc_layout),
+                Tmat_plus = step_size * build_operator_matrix(
+                    generators[i],
                     self.ci_info,
                 )
                 bra = ss.linalg.expm_multiply(Tmat + Tmat_plus, self.csf_coeffs, traceA=0.0)
                 E_plus = bra @ Hket
-                theta_params[i] -= step_size
                 gradient[i + num_kappa] = 2 * (E_plus - E) / step_size
         return gradient
 
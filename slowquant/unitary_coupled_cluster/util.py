@@ -509,7 +509,7 @@ def iterate_pair_t2_generalized(
 
 
 class UccStructure:
-    __slots__ = ("excitation_indices", "excitation_operator_type", "n_params")
+    __slots__ = ("__weakref__", "excitation_indices", "excitation_operator_type", "n_params")
 
     def __init__(self) -> None:
         """Intialize the unitary coupled cluster ansatz structure."""
@@ -604,7 +604,14 @@ class UccStructure:
 
 
 class UpsStructure:
-    __slots__ = ("excitation_indices", "excitation_operator_type", "grad_param_R", "n_params", "param_names")
+    __slots__ = (
+        "__weakref__",
+        "excitation_indices",
+        "excitation_operator_type",
+        "grad_param_R",
+        "n_params",
+        "param_names",
+    )
 
     def __init__(self) -> None:
         """Initialize the unitary product state ansatz structure."""
@@ -1,9 +1,20 @@
 # type: ignore
 import numpy as np
+import pytest
 
 import slowquant.SlowQuant as sq
 import slowquant.unitary_coupled_cluster.linear_response.naive as naivelr
 import slowquant.unitary_coupled_cluster.linear_response.selfconsistent as selfconsistentlr
+from slowquant.unitary_coupled_cluster.density_matrix import (
+    get_orbital_gradient,
+    get_orbital_response_hessian_block,
+)
+from slowquant.unitary_coupled_cluster.operator_state_algebra import (
+    build_operator_matrix,
+    propagate_state,
+    propagate_state_SA,
+)
+from slowquant.unitary_coupled_cluster.operators import Epq, hamiltonian_0i_0a
 from slowquant.unitary_coupled_cluster.ucc_wavefunction import (
     WaveFunctionUCC,
     load_wavefunction,
@@ -731,3 +742,138 @@ def test_H2_sto3g_uccsd_saveload() -> None:
     LR.calc_excitation_energies()
     assert abs(LR.excitation_energies[0] - 0.54127603) < 10**-5
     assert abs(LR.excitation_energies[1] - 0.59557678) < 10**-5
+
+
+def test_h4_sto3g_propagate_state_out() -> None:
+    """Test that propagate_state writes into a provided output array."""
+    A = sq.SlowQuant()
+    A.set_molecule(
+        """H  0.0  0.0  0.0;
+           H  1.4  0.0  0.0;
+           H  2.8  0.0  0.0;
+           H  4.2  0.0  0.0;""",
+        distance_unit="bohr",
+    )
+    A.set_basis_set("sto-3g")
+    A.init_hartree_fock()
+    A.hartree_fock.run_restricted_hartree_fock()
+    h_core = A.integral.kinetic_energy_matrix + A.integral.nuclear_attraction_matrix
+    g_eri = A.integral.electron_repulsion_tensor
+    WF = WaveFunctionUCC(
+        A.molecule.number_electrons,
+        (4, 4),
+        A.hartree_fock.mo_coeff,
+        h_core,
+        g_eri,
+        "SD",
+    )
+    WF.thetas = np.linspace(-0.3, 0.3, len(WF.thetas))
+    H = hamiltonian_0i_0a(WF.h_mo, WF.g_mo, WF.num_inactive_orbs, WF.num_active_orbs)
+    state = WF.ci_coeffs
+    states = np.array([WF.ci_coeffs, WF.csf_coeffs])
+    state_ref = np.copy(state)
+    states_ref = np.copy(states)
+    for operators in ([], [H], [H, Epq(0, 2)], [Epq(1, 3), H, Epq(0, 2)]):
+        # Single state
+        ref = propagate_state(operators, state, WF.ci_info)
+        out = np.full_like(state, np.nan)
+        res = propagate_state(operators, state, WF.ci_info, out=out)
+        assert res is out
+        assert np.allclose(res, ref, rtol=0, atol=10**-14)
+        # State-averaged
+        ref = propagate_state_SA(operators, states, WF.ci_info)
+        out = np.full_like(states, np.nan)
+        res = propagate_state_SA(operators, states, WF.ci_info, out=out)
+        assert res is out
+        assert np.allclose(res, ref, rtol=0, atol=10**-14)
+    # The input states are not modified
+    assert np.array_equal(state, state_ref)
+    assert np.array_equal(states, states_ref)
+
+
+def test_h4_sto3g_operator_outside_space() -> None:
+    """Test that an operator acting outside the active space stops the calculation."""
+    A = sq.SlowQuant()
+    A.set_molecule(
+        """H  0.0  0.0  0.0;
+           H  1.4  0.0  0.0;
+           H  2.8  0.0  0.0;
+           H  4.2  0.0  0.0;""",
+        distance_unit="bohr",
+    )
+    A.set_basis_set("sto-3g")
+    A.init_hartree_fock()
+    A.hartree_fock.run_restricted_hartree_fock()
+    h_core = A.integral.kinetic_energy_matrix + A.integral.nuclear_attraction_matrix
+    g_eri = A.integral.electron_repulsion_tensor
+    WF = WaveFunctionUCC(
+        A.molecule.number_electrons,
+        (2, 2),
+        A.hartree_fock.mo_coeff,
+        h_core,
+        g_eri,
+        "SD",
+    )
+    # Inactive to virtual excitation, that is not folded to the active space.
+    op = Epq(3, 0)
+    with pytest.raises(KeyError):
+        propagate_state([op], WF.ci_coeffs, WF.ci_info, do_folding=False)
+    with pytest.raises(KeyError):
+        propagate_state_SA([op], np.array([WF.ci_coeffs]), WF.ci_info, do_folding=False)
+    with pytest.raises(KeyError):
+        build_operator_matrix(op, WF.ci_info)
+    # The strings outside the space are ignored in unsafe mode.
+    assert np.all(propagate_state([op], WF.ci_coeffs, WF.ci_info, do_folding=False, do_unsafe=True) == 0)
+    assert build_operator_matrix(op, WF.ci_info, do_unsafe=True).nnz == 0
+
+
+def test_h4_sto3g_orbital_contractions_float32() -> None:
+    """Test single precision contractions of the orbital gradient and Hessian block."""
+    A = sq.SlowQuant()
+    A.set_molecule(
+        """H  0.0  0.0  0.0;
+           H  1.4  0.0  0.0;
+           H  2.8  0.0  0.0;
+           H  4.2  0.0  0.0;""",
+        distance_unit="bohr",
+    )
+    A.set_basis_set("sto-3g")
+    A.init_hartree_fock()
+    A.hartree_fock.run_restricted_hartree_fock()
+    h_core = A.integral.kinetic_energy_matrix + A.integral.nuclear_attraction_matrix
+    g_eri = A.integral.electron_repulsion_tensor
+    WF = WaveFunctionUCC(
+        A.molecule.number_electrons,
+        (2, 2),
+        A.hartree_fock.mo_coeff,
+        h_core,
+        g_eri,
+        "SD",
+    )
+    WF.thetas = [0.2] * len(WF.thetas)
+    # Density matrices from the states E_pq|0>, <0|E_pq E_rs|0> = <0|E_qp^dagger E_rs|0>.
+    act = range(WF.num_inactive_orbs, WF.num_inactive_orbs + WF.num_active_orbs)
+    E_kets = np.array([[propagate_state([Epq(p, q)], WF.ci_coeffs, WF.ci_info) for q in act] for p in act])
+    rdm1 = np.einsum("i,pqi->pq", WF.ci_coeffs, E_kets)
+    rdm2 = np.einsum("qpi,rsi->pqrs", E_kets, E_kets) - np.einsum("qr,ps->pqrs", np.eye(len(act)), rdm1)
+    args = (WF.h_mo, WF.g_mo, WF.kappa_idx, WF.num_inactive_orbs, WF.num_active_orbs, rdm1, rdm2)
+    grad = get_orbital_gradient(*args)
+    grad_32 = get_orbital_gradient(*args, dtype=np.float32)
+    assert grad.dtype == np.float64
+    assert grad_32.dtype == np.float64
+    assert np.allclose(grad_32, grad, rtol=0, atol=10**-5)
+    args = (
+        WF.h_mo,
+        WF.g_mo,
+        WF.kappa_idx,
+        WF.kappa_idx,
+        WF.num_inactive_orbs,
+        WF.num_active_orbs,
+        rdm1,
+        rdm2,
+    )
+    hess = get_orbital_response_hessian_block(*args)
+    hess_32 = get_orbital_response_hessian_block(*args, dtype=np.float32)
+    assert hess.dtype == np.float64
+    assert hess_32.dtype == np.float64
+    assert np.allclose(hess_32, hess, rtol=0, atol=10**-5)